@@ -1,16 +1,119 @@
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import folium
-from streamlit_folium import folium_static
+import streamlit.components.v1 as components
 
 # Import our modules
-from utils.model import generate_synthetic_data, predict_water_demand, calculate_water_savings
-from utils.scenarios import business_as_usual_scenario, uwhis_activated_scenario, get_demo_zone_data, calculate_benefits
-from utils.map_viz import create_demo_map, add_scenario_markers
-from utils.charts import create_water_usage_chart, create_temperature_chart, create_energy_chart, create_savings_chart
+from utils.model import generate_synthetic_data, generate_synthetic_data_chunks, calculate_water_savings, DATA_VERSION, DemandLookup, DemandModel, DEFAULT_MODEL_PATH
+from utils.scenarios import business_as_usual_scenario, uwhis_activated_scenario, scenario_results, calculate_benefits, calculate_benefit_bands
+from utils.zones import get_zone_registry
+from utils.map_cache import scenario_map_html
+from utils.storage import has_data, read_recent
+from utils.streaming import SensorStream, FrameSource, FileTailSource, STREAM_COLUMNS, DEFAULT_WINDOW
+from utils.dispatch import intervention_effects
+from utils.anomaly import scan_anomalies
+from utils.charts import create_water_usage_chart, create_temperature_chart, create_energy_chart, create_savings_chart, create_demand_prediction_chart
+
+# Cache settings shared by every session on this server process
+CACHE_TTL = 15 * 60  # seconds, matches the data refresh interval
+CACHE_MAX_ENTRIES = 32
+
+# Monte Carlo draws behind the Impact tab's uncertainty ranges
+BENEFIT_DRAWS = 20000
+
+# Hours of synthetic meter history scanned for anomalies when the store is empty
+ANOMALY_HOURS = 24 * 28
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_data(data_version=DATA_VERSION):
+    """Synthetic dataset, generated once per data version"""
+    return generate_synthetic_data()
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_analytics_charts(data_version=DATA_VERSION):
+    """Analytics tab figures for a data version"""
+    # With a populated store each chart reads only its own columns from disk
+    data = None if has_data() else load_data(data_version)
+    return {
+        'energy': create_energy_chart(data),
+        'forecast': create_demand_prediction_chart(data)
+    }
+
+@st.cache_resource(show_spinner=False)
+def load_sensor_stream(data_version=DATA_VERSION):
+    """Live sensor stream shared by all sessions
+
+    Seeded with the latest day of stored (or synthetic) readings, then fed
+    by whatever is appended to the readings file.
+    """
+    seed = read_recent(DEFAULT_WINDOW, STREAM_COLUMNS) if has_data() else load_data(data_version)
+    stream = SensorStream([FrameSource(seed, batch_size=len(seed)), FileTailSource()])
+    stream.poll()
+    return stream
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_stream_charts(readings, _stream):
+    """Sector and temperature figures from the stream's rolling aggregates"""
+    return {
+        'water': create_water_usage_chart(stream=_stream),
+        'temperature': create_temperature_chart(stream=_stream)
+    }
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_savings_chart(data_version=DATA_VERSION):
+    """Impact tab savings figure"""
+    return create_savings_chart()
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_scenario_results(data_version=DATA_VERSION):
+    """Computed results of both scenarios for a data version"""
+    return scenario_results()
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_benefit_bands(draws=BENEFIT_DRAWS, data_version=DATA_VERSION):
+    """5th/50th/95th percentile of each benefit under uncertain inputs"""
+    return calculate_benefit_bands(draws)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_anomaly_events(data_version=DATA_VERSION):
+    """Leak and anomaly events detected in the meter history"""
+    if has_data():
+        return scan_anomalies()
+    # One synthetic meter series per demonstration zone
+    chunks = generate_synthetic_data_chunks(n_zones=len(get_zone_registry()), periods=ANOMALY_HOURS)
+    return scan_anomalies(data=pd.concat(chunks, ignore_index=True))
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_intervention_effects(data_version=DATA_VERSION):
+    """Dispatch optimizer results behind the shifting and watering interventions"""
+    return intervention_effects()
+
+def load_scenario_map_html(scenario, data_version=DATA_VERSION):
+    """Serialized scenario map for the latest data hour (memory/disk cached)"""
+    timestamp = load_data(data_version)['timestamp'].iloc[-1]
+    return scenario_map_html(scenario, timestamp)
+
+@st.cache_resource(show_spinner=False)
+def load_saved_model(modified_time):
+    """Trained demand model, reloaded when the file on disk changes"""
+    return DemandModel.load(DEFAULT_MODEL_PATH)
+
+def current_demand_model():
+    """Saved demand model if one exists, else None (hand-tuned formula)"""
+    if not os.path.exists(DEFAULT_MODEL_PATH):
+        return None
+    return load_saved_model(os.path.getmtime(DEFAULT_MODEL_PATH))
+
+@st.cache_resource(show_spinner=False)
+def load_demand_lookup():
+    """Prediction lookup table built once per server process"""
+    zones = get_zone_registry()
+    factors = dict(zip(zones.ids, zones.water_demand / zones.water_demand.mean()))
+    return DemandLookup(current_demand_model(), zone_factors=factors)
 
 # Page configuration
 st.set_page_config(
@@ -76,15 +179,15 @@ with st.sidebar:
     st.markdown("---")
     
     # Zone selector
-    zones = get_demo_zone_data()
+    zones = get_zone_registry()
     selected_zone = st.selectbox(
         "Focus Zone",
-        list(zones.keys()),
-        format_func=lambda x: zones[x]['name']
+        list(zones.ids),
+        format_func=zones.name
     )
     
     # Display zone info
-    zone_data = zones[selected_zone]
+    zone_data = zones.zone(selected_zone)
     st.info(f"""
     **{zone_data['name']}**
     - Temperature: {zone_data['temperature']}°C
@@ -102,15 +205,14 @@ with st.sidebar:
     if st.button("🔄 Reset Simulation"):
         st.rerun()
 
-# Main content layout
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Dashboard", "🗺️ Map View", "📈 Analytics", "🎯 Impact"])
-
-with tab1:
+# Main content views - only the selected view is built on each rerun
+def render_dashboard(scenario):
+    """Dashboard view: scenario metrics and system status"""
     # Get scenario data
     if scenario == "Business as Usual":
-        scenario_data = business_as_usual_scenario()
+        scenario_data = business_as_usual_scenario(load_anomaly_events(), load_scenario_results())
     else:
-        scenario_data = uwhis_activated_scenario()
+        scenario_data = uwhis_activated_scenario(load_anomaly_events(), load_scenario_results())
     
     # Display scenario card
     card_color = "green-card" if scenario == "UWHIS Activated" else "red-card"
@@ -118,16 +220,16 @@ with tab1:
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Water Efficiency", f"{scenario_data['water_efficiency']}%")
-        st.metric("Energy Consumption", f"{scenario_data['energy_consumption']} MW")
+        st.metric("Water Efficiency", f"{scenario_data['water_efficiency']:.0f}%")
+        st.metric("Energy Consumption", f"{scenario_data['energy_consumption']:.0f} MW")
     
     with col2:
-        st.metric("Temperature Reduction", f"{scenario_data['temperature_reduction']}°C")
-        st.metric("Renewable Energy", f"{scenario_data['renewable_energy_usage']}%")
+        st.metric("Temperature Reduction", f"{scenario_data['temperature_reduction']:.1f}°C")
+        st.metric("Renewable Energy", f"{scenario_data['renewable_energy_usage']:.0f}%")
     
     with col3:
-        st.metric("Daily Water Use", scenario_data['total_water_used'])
-        st.metric("Daily Cost", scenario_data['cost_per_day'])
+        st.metric("Daily Water Use", f"{scenario_data['total_water_used']:,.0f} L/day")
+        st.metric("Daily Cost", f"AED {scenario_data['cost_per_day']:,.0f}")
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -141,19 +243,20 @@ with tab1:
         else:
             st.info(msg)
 
-with tab2:
+def render_map_view(scenario, zones):
+    """Map view: scenario map and zone details"""
     st.subheader("🗺️ Dubai Demonstration Zones")
     
     # Create and display map
-    demo_map = create_demo_map()
-    demo_map = add_scenario_markers(demo_map, scenario)
-    folium_static(demo_map, width=1000, height=500)
+    components.html(load_scenario_map_html(scenario), width=1000, height=500)
     
     # Zone details
     st.subheader("Zone Details")
-    zone_cols = st.columns(3)
+    zone_cols = st.columns(len(zones))
+    effects = load_intervention_effects()
     
-    for idx, (zone_id, zone_info) in enumerate(zones.items()):
+    for idx, zone_id in enumerate(zones.ids):
+        zone_info = zones.zone(zone_id)
         with zone_cols[idx]:
             st.markdown(f'<div class="metric-card">', unsafe_allow_html=True)
             st.write(f"**{zone_info['name']}**")
@@ -164,63 +267,90 @@ with tab2:
             
             st.write("**UWHIS Interventions:**")
             for intervention in zone_info['interventions']:
-                st.write(f"• {intervention}")
+                effect = effects.get(zone_id, {}).get(intervention)
+                st.write(f"• {intervention}" + (f": {effect}" if effect else ""))
+
+@st.fragment
+def render_prediction_widget(scenario):
+    """Prediction sliders, rerun on their own without the rest of the page"""
+    st.subheader("AI Water Demand Prediction")
+    current_temp = st.slider("Current Temperature (°C)", 30, 50, 42)
+    current_hour = st.slider("Hour of Day", 0, 23, 14)
+    
+    # O(1) read from the precomputed table; rebuilt only if the model changed
+    lookup = load_demand_lookup()
+    lookup.refresh(current_demand_model())
+    predicted = int(lookup.lookup(current_temp, current_hour))
+    st.metric("Predicted Water Demand", f"{predicted:,} L/hour")
+    
+    if scenario == "UWHIS Activated":
+        savings = calculate_water_savings(True)
+        st.success(f"UWHIS would save {savings['total_water_saved']} compared to baseline")
 
-with tab3:
+def render_analytics(scenario):
+    """Analytics view: charts and the prediction widget"""
     st.subheader("📈 Performance Analytics")
     
-    # Generate sample data
-    data = generate_synthetic_data()
+    # Load cached charts; stream charts are rebuilt only after new readings
+    stream = load_sensor_stream()
+    stream.poll()
+    charts = {**load_analytics_charts(), **load_stream_charts(stream.readings, stream)}
     
-    # Create charts
     col1, col2 = st.columns(2)
     
     with col1:
-        water_chart = create_water_usage_chart(data)
-        st.plotly_chart(water_chart, use_container_width=True)
-        
-        temp_chart = create_temperature_chart(data)
-        st.plotly_chart(temp_chart, use_container_width=True)
+        st.plotly_chart(charts['water'], use_container_width=True)
+        st.plotly_chart(charts['temperature'], use_container_width=True)
+        st.plotly_chart(charts['forecast'], use_container_width=True)
     
     with col2:
-        energy_chart = create_energy_chart(data)
-        st.plotly_chart(energy_chart, use_container_width=True)
+        st.plotly_chart(charts['energy'], use_container_width=True)
         
         # Water prediction
-        st.subheader("AI Water Demand Prediction")
-        current_temp = st.slider("Current Temperature (°C)", 30, 50, 42)
-        current_hour = st.slider("Hour of Day", 0, 23, 14)
-        
-        predicted = predict_water_demand(current_temp, current_hour)
-        st.metric("Predicted Water Demand", f"{predicted:,} L/hour")
-        
-        if scenario == "UWHIS Activated":
-            savings = calculate_water_savings(True)
-            st.success(f"UWHIS would save {savings['total_water_saved']} compared to baseline")
+        render_prediction_widget(scenario)
 
-with tab4:
+def render_impact():
+    """Impact view: benefits and success story"""
     st.subheader("🎯 UWHIS Impact Assessment")
     
-    # Calculate benefits
-    benefits = calculate_benefits()
+    # Calculate benefits and their uncertainty
+    benefits = calculate_benefits(load_scenario_results())
+    bands = load_benefit_bands()
+    formats = {
+        'water_savings': "{:.0f}%",
+        'energy_savings': "{:.0f} MW",
+        'cost_savings': "AED {:,.0f}/day",
+        'co2_reduction': "{:,.0f} tons/day",
+        'temperature_reduction': "{:.1f}°C"
+    }
+    value = {metric: fmt.format(benefits[metric]) for metric, fmt in formats.items()}
+    band = {metric: f"90% range: {fmt.format(bands.loc[metric, 'p5'])} – {fmt.format(bands.loc[metric, 'p95'])}"
+            for metric, fmt in formats.items()}
     
     # Impact metrics
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Water Savings", benefits['water_savings'])
-        st.metric("CO₂ Reduction", benefits['co2_reduction'])
+        st.metric("Water Savings", value['water_savings'], help=band['water_savings'])
+        st.metric("CO₂ Reduction", value['co2_reduction'], help=band['co2_reduction'])
     
     with col2:
-        st.metric("Energy Savings", benefits['energy_savings'])
-        st.metric("Cost Savings", benefits['cost_savings'])
+        st.metric("Energy Savings", value['energy_savings'], help=band['energy_savings'])
+        st.metric("Cost Savings", value['cost_savings'], help=band['cost_savings'])
     
     with col3:
-        st.metric("Temperature Improvement", benefits['temperature_reduction'])
+        st.metric("Temperature Improvement", value['temperature_reduction'], help=band['temperature_reduction'])
         st.metric("Implementation ROI", "8 months")
     
+    with st.expander(f"Uncertainty ranges ({BENEFIT_DRAWS:,} simulated days)"):
+        st.dataframe(pd.DataFrame({
+            'Median': [formats[m].format(bands.loc[m, 'p50']) for m in formats],
+            '5th percentile': [formats[m].format(bands.loc[m, 'p5']) for m in formats],
+            '95th percentile': [formats[m].format(bands.loc[m, 'p95']) for m in formats]
+        }, index=['Water Savings', 'Energy Savings', 'Cost Savings', 'CO₂ Reduction', 'Temperature Improvement']))
+    
     # Savings chart
-    savings_chart = create_savings_chart()
+    savings_chart = load_savings_chart()
     st.plotly_chart(savings_chart, use_container_width=True)
     
     # Narrative
@@ -243,6 +373,16 @@ with tab4:
     Contact us to schedule a personalized demonstration for your municipality.
     """)
 
+# Main content layout
+views = {
+    "📊 Dashboard": lambda: render_dashboard(scenario),
+    "🗺️ Map View": lambda: render_map_view(scenario, zones),
+    "📈 Analytics": lambda: render_analytics(scenario),
+    "🎯 Impact": render_impact
+}
+view = st.radio("View", list(views.keys()), horizontal=True, label_visibility="collapsed", key="view")
+views[view]()
+
 # Footer
 st.markdown("---")
 st.caption("""
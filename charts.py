@@ -1,19 +1,124 @@
+import json
+import threading
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def create_water_usage_chart(data):
-    """Create interactive water usage chart"""
-    # Prepare data for sector comparison
+try:
+    from .storage import read_timeseries, read_recent, read_rollup, rollup_frame, DEFAULT_POINT_BUDGET
+    from .backtest import last_window_forecast
+except ImportError:
+    from storage import read_timeseries, read_recent, read_rollup, rollup_frame, DEFAULT_POINT_BUDGET
+    from backtest import last_window_forecast
+
+# Columns each chart reads when loading from the store
+SECTOR_COLUMNS = ['residential_water', 'agricultural_water', 'industrial_water']
+
+# Series longer than this are downsampled (LTTB) before plotting
+DOWNSAMPLE_THRESHOLD = 2000
+# Traces with more points than this are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = 1000
+
+def lttb_indices(x, y, n_out):
+    """Indices of ``n_out`` points chosen by Largest-Triangle-Three-Buckets
+
+    The first and last points are kept; the rest are split into equal
+    buckets and each bucket keeps the point forming the largest triangle
+    with the previously kept point and the mean of the next bucket. Bucket
+    means and triangle areas are computed with NumPy; only the hand-off
+    from one bucket to the next is a Python loop.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    next_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes, x[-1])[1:]
+    next_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes, y[-1])[1:]
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def downsample_index(x, *ys, threshold=DOWNSAMPLE_THRESHOLD):
+    """Rows to plot so several series sharing ``x`` stay within ``threshold`` points
+
+    Each series gets an equal share of the budget and the kept rows are
+    merged, so peaks of every series survive.
+    """
+    n = len(x)
+    if n <= threshold:
+        return np.arange(n)
+    x = pd.to_numeric(pd.Series(x)).to_numpy(dtype=np.float64)
+    share = max(threshold // max(len(ys), 1), 3)
+    return np.unique(np.concatenate([lttb_indices(x, y, share) for y in ys]))
+
+def _scatter_type(n_points, threshold=WEBGL_THRESHOLD):
+    """go.Scattergl above the WebGL threshold, go.Scatter below it"""
+    return go.Scattergl if n_points > threshold else go.Scatter
+
+class FigureFactory:
+    """Chart skeletons built once, with trace data swapped in per request
+
+    A skeleton is a chart's complete figure (template, layout, threshold
+    lines, annotations and trace styling) with empty traces. Its JSON is
+    built the first time a chart variant is requested and cached. Each
+    request parses that JSON, drops the data arrays into the traces and
+    wraps it without validation: Plotly validated the skeleton when it
+    was built, and only data arrays change afterwards. Figures without
+    per-request data are served straight from the cached JSON.
+    """
+
+    def __init__(self):
+        self._builders = {}
+        self._specs = {}
+        self._lock = threading.Lock()
+
+    def register(self, name):
+        """Decorator registering a skeleton builder under ``name``"""
+        def decorator(builder):
+            self._builders[name] = builder
+            return builder
+        return decorator
+
+    def spec(self, name, *variant):
+        """Serialized skeleton of a chart variant, built on first use"""
+        key = (name,) + variant
+        with self._lock:
+            if key not in self._specs:
+                self._specs[key] = pio.to_json(self._builders[name](*variant), validate=False)
+            return self._specs[key]
+
+    def figure(self, name, *variant, traces=(), title=None):
+        """Figure from the cached skeleton with each trace's data swapped in"""
+        spec = json.loads(self.spec(name, *variant))
+        for trace, data in zip(spec['data'], traces):
+            trace.update(data)
+        if title is not None:
+            spec['layout']['title']['text'] = title
+        return go.Figure(spec, _validate=False)
+
+FIGURES = FigureFactory()
+
+SECTOR_NAMES = ['Residential', 'Agricultural', 'Industrial']
+
+@FIGURES.register('water')
+def _water_usage_figure():
     sector_data = pd.DataFrame({
-        'Sector': ['Residential', 'Agricultural', 'Industrial'],
-        'Water Usage (L/hour)': [
-            data['residential_water'].mean(),
-            data['agricultural_water'].mean(),
-            data['industrial_water'].mean()
-        ]
+        'Sector': SECTOR_NAMES,
+        'Water Usage (L/hour)': [0.0, 0.0, 0.0]
     })
     
     fig = px.bar(
@@ -39,19 +144,52 @@ def create_water_usage_chart(data):
     
     return fig
 
-def create_temperature_chart(data):
-    """Create temperature trend chart"""
-    # Sample last 24 hours
-    recent_data = data.tail(24).copy()
+def create_water_usage_chart(data=None, stream=None):
+    """Create interactive water usage chart"""
+    # A sensor stream already holds rolling means; otherwise average the frame
+    if stream is not None:
+        usage = [stream.aggregates(column)['mean'] for column in SECTOR_COLUMNS]
+    else:
+        if data is None:
+            data = read_timeseries(columns=SECTOR_COLUMNS)
+        usage = [data[column].mean() for column in SECTOR_COLUMNS]
     
+    # One bar trace per sector
+    return FIGURES.figure('water', traces=[{'y': [value], 'text': [value]} for value in usage])
+
+def _span_label(span):
+    """'24h' -> '24 Hours', '30D' -> '30 Days'"""
+    span = pd.Timedelta(span)
+    if span <= pd.Timedelta(days=2):
+        return f"{span / pd.Timedelta(hours=1):.0f} Hours"
+    return f"{span / pd.Timedelta(days=1):.0f} Days"
+
+def _load_span(data, columns, span, max_points):
+    """Rollup of the last ``span`` at the finest level within the point budget"""
+    if data is None:
+        return read_rollup(columns, span=span, max_points=max_points)
+    return rollup_frame(data, columns, span, max_points)
+
+@FIGURES.register('temperature')
+def _temperature_figure(band, webgl):
+    empty = pd.DataFrame({'timestamp': pd.to_datetime([]), 'temperature': np.array([], dtype=np.float64)})
     fig = px.line(
-        recent_data,
+        empty,
         x='timestamp',
         y='temperature',
-        title='Temperature Trend (Last 24 Hours)',
-        markers=True
+        title='Temperature Trend',
+        markers=not webgl,
+        render_mode='webgl' if webgl else 'svg'
     )
     
+    # Daily or weekly buckets also show their range
+    if band:
+        fig.add_trace((go.Scattergl if webgl else go.Scatter)(
+            x=[], y=[],
+            fill='toself', fillcolor='rgba(99, 110, 250, 0.15)', line=dict(width=0),
+            name='Min-max range', hoverinfo='skip'
+        ))
+    
     # Add threshold lines
     fig.add_hline(y=40, line_dash="dash", line_color="red", 
                   annotation_text="Heat Alert Threshold", 
@@ -68,26 +206,52 @@ def create_temperature_chart(data):
     
     return fig
 
-def create_energy_chart(data):
-    """Create energy usage vs solar power chart"""
-    # Sample data
-    sample_data = data.tail(12).copy()
+def create_temperature_chart(data=None, stream=None, span='24h', max_points=DEFAULT_POINT_BUDGET,
+                             downsample_threshold=DOWNSAMPLE_THRESHOLD, webgl_threshold=WEBGL_THRESHOLD):
+    """Create temperature trend chart"""
+    # Sample the last ``span``; long spans come pre-aggregated
+    if stream is not None:
+        recent_data = stream.recent('temperature', periods=24)
+    else:
+        recent_data = _load_span(data, ['temperature'], span, max_points)
+    band = recent_data.attrs.get('level') not in (None, 'hour')
+    keep = downsample_index(recent_data['timestamp'], recent_data['temperature'], threshold=downsample_threshold)
+    recent_data = recent_data.iloc[keep]
     
+    timestamps = recent_data['timestamp'].to_numpy()
+    traces = [{'x': timestamps, 'y': recent_data['temperature'].to_numpy()}]
+    if band:
+        traces.append({
+            'x': np.concatenate([timestamps, timestamps[::-1]]),
+            'y': np.concatenate([recent_data['temperature_max'], recent_data['temperature_min'][::-1]])
+        })
+    return FIGURES.figure('temperature', band, len(recent_data) > webgl_threshold, traces=traces,
+                          title=f'Temperature Trend (Last {_span_label(span)})')
+
+@FIGURES.register('energy')
+def _energy_figure(webgl):
     fig = go.Figure()
     
-    # Add energy consumption bars
-    fig.add_trace(go.Bar(
-        x=sample_data['timestamp'],
-        y=sample_data['energy_consumption'],
-        name='Energy Consumption',
-        marker_color='#EF4444',
-        opacity=0.7
-    ))
+    # Add energy consumption bars (a filled WebGL area once there are too many bars)
+    if webgl:
+        fig.add_trace(go.Scattergl(
+            x=[], y=[],
+            name='Energy Consumption',
+            fill='tozeroy',
+            line=dict(color='#EF4444', width=1),
+            opacity=0.7
+        ))
+    else:
+        fig.add_trace(go.Bar(
+            x=[], y=[],
+            name='Energy Consumption',
+            marker_color='#EF4444',
+            opacity=0.7
+        ))
     
     # Add solar power line
-    fig.add_trace(go.Scatter(
-        x=sample_data['timestamp'],
-        y=sample_data['solar_power'],
+    fig.add_trace((go.Scattergl if webgl else go.Scatter)(
+        x=[], y=[],
         name='Solar Power Available',
         line=dict(color='#F59E0B', width=3),
         yaxis='y2'
@@ -107,8 +271,23 @@ def create_energy_chart(data):
     
     return fig
 
-def create_savings_chart():
-    """Create savings comparison chart"""
+def create_energy_chart(data=None, span='12h', max_points=DEFAULT_POINT_BUDGET,
+                        downsample_threshold=DOWNSAMPLE_THRESHOLD, webgl_threshold=WEBGL_THRESHOLD):
+    """Create energy usage vs solar power chart"""
+    # Sample the last ``span``; long spans come pre-aggregated
+    sample_data = _load_span(data, ['energy_consumption', 'solar_power'], span, max_points)
+    keep = downsample_index(sample_data['timestamp'], sample_data['energy_consumption'],
+                            sample_data['solar_power'], threshold=downsample_threshold)
+    sample_data = sample_data.iloc[keep]
+    
+    timestamps = sample_data['timestamp'].to_numpy()
+    return FIGURES.figure('energy', len(sample_data) > webgl_threshold, traces=[
+        {'x': timestamps, 'y': sample_data['energy_consumption'].to_numpy()},
+        {'x': timestamps, 'y': sample_data['solar_power'].to_numpy()}
+    ])
+
+@FIGURES.register('savings')
+def _savings_figure():
     savings_data = pd.DataFrame({
         'Metric': ['Water Efficiency', 'Energy Savings', 'Cost Reduction', 'CO₂ Reduction'],
         'Business as Usual': [65, 0, 0, 0],
@@ -145,57 +324,78 @@ def create_savings_chart():
     
     return fig
 
-def create_demand_prediction_chart():
-    """Create water demand prediction chart"""
-    # Simulate prediction data
-    hours = list(range(24))
-    predicted = [800 + 50 * np.sin(h/24 * 2*np.pi) + np.random.normal(0, 20) for h in hours]
-    actual = [p + np.random.normal(0, 30) for p in predicted]
-    
+def create_savings_chart():
+    """Create savings comparison chart (static, served from the cached JSON)"""
+    return FIGURES.figure('savings')
+
+@FIGURES.register('forecast')
+def _demand_prediction_figure(webgl):
+    scatter = go.Scattergl if webgl else go.Scatter
     fig = go.Figure()
     
-    fig.add_trace(go.Scatter(
-        x=hours,
-        y=predicted,
-        mode='lines+markers',
+    fig.add_trace(scatter(
+        x=[], y=[],
+        mode='lines' if webgl else 'lines+markers',
         name='AI Prediction',
         line=dict(color='#3B82F6', width=3)
     ))
     
-    fig.add_trace(go.Scatter(
-        x=hours,
-        y=actual,
+    fig.add_trace(scatter(
+        x=[], y=[],
         mode='lines',
         name='Actual Demand',
         line=dict(color='#10B981', width=2, dash='dot')
     ))
     
-    # Fill between lines
-    fig.add_trace(go.Scatter(
-        x=hours + hours[::-1],
-        y=predicted + actual[::-1],
+    # Fill between error bounds
+    fig.add_trace(scatter(
+        x=[], y=[],
         fill='toself',
         fillcolor='rgba(59, 130, 246, 0.2)',
         line=dict(color='rgba(255,255,255,0)'),
-        name='Prediction Range'
+        name='Backtest Error (MAE)'
     ))
     
     fig.update_layout(
-        title='24-Hour Water Demand Forecast',
-        xaxis_title='Hour of Day',
+        title='Water Demand Forecast',
+        xaxis_title='Time',
         yaxis_title='Water Demand (L/hour)',
         hovermode='x unified'
     )
     
     return fig
 
+def create_demand_prediction_chart(data=None, model=None, horizon=24,
+                                   downsample_threshold=DOWNSAMPLE_THRESHOLD, webgl_threshold=WEBGL_THRESHOLD):
+    """Create water demand prediction chart from backtested forecasts"""
+    # Forecast the last ``horizon`` hours from the history before them
+    if data is None:
+        data = read_recent(max(24 * 28, horizon * 4), ['temperature', 'total_water_demand'])
+    forecast = last_window_forecast(data, horizon=horizon, model=model)
+    keep = downsample_index(forecast['timestamp'], forecast['predicted'], forecast['actual'],
+                            threshold=downsample_threshold)
+    forecast = forecast.iloc[keep]
+    
+    hours = forecast['timestamp'].to_numpy()
+    predicted = forecast['predicted'].to_numpy()
+    
+    # Band from the backtested mean absolute error at each horizon step
+    upper = predicted + forecast['mae'].to_numpy()
+    lower = predicted - forecast['mae'].to_numpy()
+    
+    return FIGURES.figure('forecast', len(forecast) > webgl_threshold, traces=[
+        {'x': hours, 'y': predicted},
+        {'x': hours, 'y': forecast['actual'].to_numpy()},
+        {'x': np.concatenate([hours, hours[::-1]]), 'y': np.concatenate([upper, lower[::-1]])}
+    ], title=f'{horizon}-Hour Water Demand Forecast')
+
 # Test the functions
 if __name__ == "__main__":
     print("📊 Testing chart creation...")
     
     # Create test data
     test_data = pd.DataFrame({
-        'timestamp': pd.date_range('2024-01-15', periods=100, freq='H'),
+        'timestamp': pd.date_range('2024-01-15', periods=100, freq='h'),
         'residential_water': np.random.normal(500, 50, 100),
         'agricultural_water': np.random.normal(800, 100, 100),
         'industrial_water': np.random.normal(300, 30, 100),
@@ -209,6 +409,16 @@ if __name__ == "__main__":
     temp_chart = create_temperature_chart(test_data)
     energy_chart = create_energy_chart(test_data)
     savings_chart = create_savings_chart()
+    demand_chart = create_demand_prediction_chart(test_data.assign(total_water_demand=np.random.normal(1900, 80, 100)))
+    
+    # Compact frames go through the span rollups unchanged
+    from compact import CompactFrame
+    from model import generate_synthetic_data
+    synthetic = generate_synthetic_data()
+    compact = CompactFrame.from_frame(synthetic)
+    for create in (create_temperature_chart, create_energy_chart):
+        compact_chart = create(compact)
+        assert len(compact_chart.data[0].x) == len(create(synthetic).data[0].x)
     
     print("✅ All charts created successfully!")
     print(f"Water chart type: {type(water_chart)}")
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .model import SECTOR_SHARES
+except ImportError:
+    from model import SECTOR_SHARES
+
+# Columns stored as int16 with a fixed scale (value = stored * scale)
+SCALED_COLUMNS = {
+    'temperature': 0.01,   # 0.01°C steps, ±327°C range
+    'solar_power': 0.1     # 0.1 MW steps, ±3276 MW range
+}
+
+# Categorical key columns stored as integer codes
+KEY_COLUMNS = ['zone', 'sector']
+
+_INT16 = np.iinfo(np.int16)
+
+class CompactFrame:
+    """Memory-compact, read-only view of a synthetic time-series frame
+
+    Numeric columns are held as float32, or as scaled int16 where the range
+    allows. Zone and sector keys are categorical codes. Sector water columns
+    are not stored at all: they are fixed shares of total_water_demand and
+    are derived when accessed. Indexing, ``tail`` and ``head`` return plain
+    pandas objects, so existing chart functions accept a CompactFrame as-is.
+    """
+
+    def __init__(self, columns, scales, categories, shares, order):
+        self._columns = columns
+        self._scales = scales
+        self._categories = categories
+        self._shares = shares
+        self._order = order
+
+    @classmethod
+    def from_frame(cls, data, sector_shares=SECTOR_SHARES):
+        """Pack a DataFrame, dropping sector columns that follow the shares"""
+        columns = {}
+        scales = {}
+        categories = {}
+        shares = {}
+
+        for name in data.columns:
+            values = data[name]
+
+            if name in sector_shares and 'total_water_demand' in data:
+                expected = data['total_water_demand'] * sector_shares[name]
+                if np.allclose(values, expected, rtol=1e-6):
+                    shares[name] = sector_shares[name]
+                    continue
+
+            if name in KEY_COLUMNS:
+                codes, uniques = pd.factorize(values)
+                columns[name] = codes.astype(np.int16 if len(uniques) <= _INT16.max else np.int32)
+                categories[name] = uniques
+            elif pd.api.types.is_datetime64_any_dtype(values):
+                columns[name] = values.to_numpy()
+            elif name in SCALED_COLUMNS:
+                scaled = np.round(values.to_numpy() / SCALED_COLUMNS[name])
+                if scaled.min() >= _INT16.min and scaled.max() <= _INT16.max:
+                    columns[name] = scaled.astype(np.int16)
+                    scales[name] = SCALED_COLUMNS[name]
+                else:
+                    columns[name] = values.to_numpy(dtype=np.float32)
+            else:
+                columns[name] = values.to_numpy(dtype=np.float32)
+
+        return cls(columns, scales, categories, shares, list(data.columns))
+
+    @property
+    def columns(self):
+        return list(self._order)
+
+    def __len__(self):
+        return len(next(iter(self._columns.values())))
+
+    def __contains__(self, name):
+        return name in self._order
+
+    def _decode(self, name, rows=slice(None)):
+        """Column values for a row slice, derived or unpacked"""
+        if name in self._shares:
+            return self._decode('total_water_demand', rows) * np.float32(self._shares[name])
+
+        values = self._columns[name][rows]
+        if name in self._scales:
+            return values * np.float32(self._scales[name])
+        if name in self._categories:
+            return pd.Categorical.from_codes(values, categories=self._categories[name])
+        return values
+
+    def _frame(self, rows):
+        return pd.DataFrame({name: self._decode(name, rows) for name in self._order})
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return pd.Series(self._decode(key), name=key)
+        return pd.DataFrame({name: self._decode(name) for name in key})
+
+    def head(self, n=5):
+        return self._frame(slice(0, n))
+
+    def tail(self, n=5):
+        return self._frame(slice(max(len(self) - n, 0), None))
+
+    def to_frame(self):
+        """Expand back into a regular DataFrame"""
+        return self._frame(slice(None))
+
+    def memory_usage(self):
+        """Bytes held by the stored arrays"""
+        return sum(values.nbytes for values in self._columns.values())
+
+# Test the functions
+if __name__ == "__main__":
+    from model import generate_synthetic_data_chunks
+
+    print("🗜️ Testing compact frames...")
+    data = pd.concat(generate_synthetic_data_chunks(n_zones=10, periods=24 * 365, chunk_size=24 * 365),
+                     ignore_index=True)
+    compact = CompactFrame.from_frame(data)
+    original = data.memory_usage(index=False).sum()
+    print(f"✅ {original / 1e6:.1f} MB -> {compact.memory_usage() / 1e6:.1f} MB "
+          f"({original / compact.memory_usage():.1f}x smaller)")
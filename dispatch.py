@@ -0,0 +1,186 @@
+import numpy as np
+
+try:
+    from .scenario_engine import daily_profile, SECTORS
+    from .scenarios import uwhis_activated_scenario
+    from .zones import get_zone_registry
+except ImportError:
+    from scenario_engine import daily_profile, SECTORS
+    from scenarios import uwhis_activated_scenario
+    from zones import get_zone_registry
+
+HOURS = 24
+DISPATCH_COLUMNS = ['total_water_demand', 'energy_consumption', 'solar_power', 'temperature']
+
+# Energy intensity of producing and lifting water (desalination + pumping)
+PUMP_KWH_PER_LITER = 0.004
+
+# Zone equipment sized from its daily water demand (per 1,000 L/day)
+SOLAR_KW_PER_KLD = 0.6         # peak solar output, kW
+BASE_KW_PER_KLD = 0.1          # mean non-shiftable load, kW
+PUMP_CAPACITY_FACTOR = 2.5     # pump capacity as a multiple of the mean hourly volume
+IRRIGATION_RATE_FACTOR = 2.0   # irrigation capacity as a multiple of the mean window rate
+
+# Irrigation hours allowed under "Evening watering"
+EVENING_WATERING_HOURS = [19, 20, 21, 22, 23, 0, 1, 2, 3, 4, 5]
+
+# Zone interventions that switch the optimizer on
+SHIFT_INTERVENTIONS = {'Peak shifting', 'Solar pumping'}
+WATERING_INTERVENTIONS = {'Evening watering'}
+
+def _fill(volume, capacity, priority):
+    """Vectorized greedy: pour ``volume`` into hours in ``priority`` order
+
+    ``volume`` is (zones,), ``capacity`` and ``priority`` are (zones, hours);
+    lower priority values fill first, each hour up to its capacity. The
+    fill level of every hour comes from one cumulative sum over the hours
+    in priority order.
+    """
+    order = np.argsort(priority, axis=1, kind='stable')
+    capacity_sorted = np.take_along_axis(capacity, order, axis=1)
+    before = np.cumsum(capacity_sorted, axis=1) - capacity_sorted
+    allocated_sorted = np.clip(volume[:, None] - before, 0, capacity_sorted)
+    allocated = np.empty_like(allocated_sorted)
+    np.put_along_axis(allocated, order, allocated_sorted, axis=1)
+    return allocated
+
+def optimize_dispatch(solar, base_load, demand, temperature, sector_shares, shift_pumping=True,
+                      evening_watering=True, pump_capacity=None):
+    """Schedule water delivery and pumping over 24 hours for many zones
+
+    ``solar`` and ``base_load`` are (zones, 24) kW, ``demand`` is (zones, 24)
+    L/hour of water demand, ``temperature`` is (24,) or (zones, 24) and
+    ``sector_shares`` holds one share per sector in SECTORS. The flags are
+    booleans or one per zone.
+
+    Residential and industrial water is delivered as demanded. With
+    ``evening_watering`` the agricultural volume moves into the evening
+    window, coolest hours first. With ``shift_pumping`` the day's pumping
+    goes first into solar surplus (solar minus base load), then into the
+    hours with the lowest net grid load, never above the pump capacity;
+    otherwise water is pumped as it is delivered. Storage covers the gap
+    between pumping and delivery.
+
+    Returns a dict of arrays: 'delivery' (zones, sectors, 24) L/hour,
+    'pumping' (zones, 24) L/hour, 'load' and 'grid' (zones, 24) kW,
+    'self_consumption' (share of solar used), 'storage' (reservoir needed,
+    L) and 'unmet' (L/day the pumps could not deliver) per zone.
+    """
+    solar, base_load, demand = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (solar, base_load, demand))
+    n_zones = len(demand)
+    temperature = np.broadcast_to(np.asarray(temperature, dtype=np.float64), demand.shape)
+    shift_pumping = np.broadcast_to(shift_pumping, n_zones)
+    evening_watering = np.broadcast_to(evening_watering, n_zones)
+    shares = np.asarray(sector_shares, dtype=np.float64)
+    shares = shares / shares.sum()
+
+    # Delivery per sector; irrigation optionally moved into the evening window
+    delivery = demand[:, None, :] * shares[None, :, None]
+    agricultural = SECTORS.index('agricultural')
+    irrigation = delivery[:, agricultural].sum(axis=1)
+    window = np.isin(np.arange(HOURS), EVENING_WATERING_HOURS)
+    window_capacity = np.where(window, IRRIGATION_RATE_FACTOR * irrigation[:, None] / window.sum(), 0)
+    watered = _fill(irrigation, window_capacity, temperature)
+    delivery[:, agricultural] = np.where(evening_watering[:, None], watered, delivery[:, agricultural])
+    total_delivery = delivery.sum(axis=1)
+
+    # Pumping: solar surplus first, then the lowest net grid load
+    volume = total_delivery.sum(axis=1)
+    if pump_capacity is None:
+        pump_capacity = PUMP_CAPACITY_FACTOR * volume / HOURS
+    capacity = np.broadcast_to(np.asarray(pump_capacity, dtype=np.float64).reshape(-1, 1), demand.shape)
+    surplus = np.maximum(solar - base_load, 0)
+    on_solar = _fill(volume, np.minimum(capacity, surplus / PUMP_KWH_PER_LITER), -surplus)
+    remaining = volume - on_solar.sum(axis=1)
+    on_grid = _fill(remaining, capacity - on_solar, base_load - solar)
+    shifted = on_solar + on_grid
+    pumping = np.where(shift_pumping[:, None], shifted, total_delivery)
+
+    load = base_load + pumping * PUMP_KWH_PER_LITER
+    used_solar = np.minimum(solar, load)
+    level = np.cumsum(pumping - total_delivery, axis=1)
+    return {
+        'delivery': delivery,
+        'pumping': pumping,
+        'load': load,
+        'grid': load - used_solar,
+        'self_consumption': used_solar.sum(axis=1) / np.maximum(solar.sum(axis=1), 1e-9),
+        'storage': np.maximum(level.max(axis=1), 0) - np.minimum(level.min(axis=1), 0),
+        'unmet': np.where(shift_pumping, np.maximum(volume - shifted.sum(axis=1), 0), 0)
+    }
+
+def zone_dispatch_inputs(registry=None, profile=None, sector_shares=None):
+    """Optimizer inputs for every zone of a registry
+
+    Zone series follow the city-wide hourly profile scaled by each zone's
+    daily water demand. Sector shares default to the UWHIS scenario's water
+    distribution, and each zone's interventions set the optimizer flags.
+    """
+    registry = get_zone_registry() if registry is None else registry
+    profile = daily_profile(columns=DISPATCH_COLUMNS) if profile is None else profile
+    if sector_shares is None:
+        distribution = uwhis_activated_scenario()['water_distribution']
+        sector_shares = [distribution[sector] for sector in SECTORS]
+
+    daily_kl = registry.water_demand[:, None] / 1000.0
+    water_shape = profile['total_water_demand'] / profile['total_water_demand'].sum()
+    solar_shape = profile['solar_power'] / profile['solar_power'].max()
+    load_shape = profile['energy_consumption'] / profile['energy_consumption'].mean()
+    return {
+        'solar': SOLAR_KW_PER_KLD * daily_kl * solar_shape,
+        'base_load': BASE_KW_PER_KLD * daily_kl * load_shape,
+        'demand': registry.water_demand[:, None] * water_shape,
+        'temperature': profile['temperature'],
+        'sector_shares': sector_shares,
+        'shift_pumping': np.array([bool(SHIFT_INTERVENTIONS & set(i)) for i in registry.interventions]),
+        'evening_watering': np.array([bool(WATERING_INTERVENTIONS & set(i)) for i in registry.interventions])
+    }
+
+def intervention_effects(registry=None, profile=None):
+    """What the dispatch-driven interventions achieve in each zone
+
+    Compares the optimized plan with water pumped and irrigated as it is
+    demanded. Returns {zone_id: {intervention: description}} for zones with
+    a shifting or watering intervention.
+    """
+    registry = get_zone_registry() if registry is None else registry
+    inputs = zone_dispatch_inputs(registry, profile)
+    plan = optimize_dispatch(**inputs)
+    baseline = optimize_dispatch(**dict(inputs, shift_pumping=False, evening_watering=False))
+
+    # Pumping in the four highest net-load hours, optimized vs as demanded
+    peak = np.argsort(inputs['base_load'] - inputs['solar'], axis=1)[:, -4:]
+    peak_cut = 1 - (np.take_along_axis(plan['pumping'], peak, axis=1).sum(axis=1) /
+                    np.maximum(np.take_along_axis(baseline['pumping'], peak, axis=1).sum(axis=1), 1e-9))
+    agricultural = SECTORS.index('agricultural')
+    irrigation = plan['delivery'][:, agricultural]
+
+    effects = {}
+    for row, zone_id in enumerate(registry.ids):
+        notes = {}
+        for name in SHIFT_INTERVENTIONS & set(registry.interventions[row]):
+            notes[name] = (f"solar self-consumption {baseline['self_consumption'][row]:.0%} → "
+                           f"{plan['self_consumption'][row]:.0%}, peak-hour pumping -{peak_cut[row]:.0%}")
+        for name in WATERING_INTERVENTIONS & set(registry.interventions[row]):
+            used = [h for h in EVENING_WATERING_HOURS if irrigation[row, h] > 0]
+            notes[name] = (f"irrigation {used[0]:02d}:00–{(used[-1] + 1) % HOURS:02d}:00, "
+                           f"mean {np.average(inputs['temperature'], weights=irrigation[row]):.1f}°C vs "
+                           f"{np.average(inputs['temperature'], weights=baseline['delivery'][row, agricultural]):.1f}°C")
+        if notes:
+            effects[zone_id] = notes
+    return effects
+
+# Test the functions
+if __name__ == "__main__":
+    import time
+    from zones import generate_synthetic_zones
+
+    print("☀️ Testing dispatch optimizer...")
+    for zone_id, notes in intervention_effects().items():
+        for name, note in notes.items():
+            print(f"{zone_id} / {name}: {note}")
+    inputs = zone_dispatch_inputs(generate_synthetic_zones(1000))
+    started = time.perf_counter()
+    plan = optimize_dispatch(**dict(inputs, shift_pumping=True))
+    print(f"✅ 1000 zones x 24h in {(time.perf_counter() - started) * 1000:.1f}ms, "
+          f"mean self-consumption {plan['self_consumption'].mean():.0%}, unmet {plan['unmet'].sum():.0f} L")
@@ -0,0 +1,169 @@
+import os
+import shutil
+import struct
+import zlib
+import folium
+import numpy as np
+import pandas as pd
+
+try:
+    from .map_viz import heat_island_temperature, DUBAI_BOUNDS
+    from .zones import get_zone_registry
+except ImportError:
+    from map_viz import heat_island_temperature, DUBAI_BOUNDS
+    from zones import get_zone_registry
+
+# Tiles are written under static/ so Streamlit can serve them when
+# server.enableStaticServing is on; the browser then fetches app/static/...
+TILE_ROOT = os.path.join('static', 'tiles')
+TILE_URL_ROOT = 'app/static/tiles'
+TILE_SIZE = 256
+DEFAULT_ZOOMS = (10, 11, 12, 13)
+
+# Temperature range mapped onto the color ramp
+TEMPERATURE_RANGE = (25.0, 45.0)
+
+# Color ramp stops: position in [0, 1] -> RGBA
+COLOR_STOPS = np.array([
+    [0.00, 49, 54, 149, 150],
+    [0.35, 116, 173, 209, 160],
+    [0.55, 254, 224, 144, 170],
+    [0.75, 244, 109, 67, 185],
+    [1.00, 165, 0, 38, 200]
+])
+
+def _build_colormap(levels=256):
+    """Lookup table of ``levels`` RGBA colors interpolated between the stops"""
+    positions = np.linspace(0, 1, levels)
+    channels = [np.interp(positions, COLOR_STOPS[:, 0], COLOR_STOPS[:, c]) for c in range(1, 5)]
+    return np.stack(channels, axis=-1).round().astype(np.uint8)
+
+COLORMAP = _build_colormap()
+
+def tile_range(bounds, zoom):
+    """Inclusive x and y tile ranges covering a [[south, west], [north, east]] box"""
+    (south, west), (north, east) = bounds
+    n = 2 ** zoom
+    to_x = lambda lon: int((lon + 180.0) / 360.0 * n)
+    to_y = lambda lat: int((1 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2 * n)
+    return (to_x(west), to_x(east)), (to_y(north), to_y(south))
+
+def colorize(temperatures, value_range=TEMPERATURE_RANGE):
+    """Map a temperature array to RGBA pixels through the colormap"""
+    low, high = value_range
+    missing = np.isnan(temperatures)
+    scaled = np.clip((np.where(missing, low, temperatures) - low) / (high - low), 0, 1)
+    rgba = COLORMAP[(scaled * (len(COLORMAP) - 1)).round().astype(np.intp)]
+    rgba[missing] = 0
+    return rgba
+
+def encode_png(rgba):
+    """Encode an (height, width, 4) uint8 array as PNG bytes"""
+    height, width, _ = rgba.shape
+    # Each scanline is prefixed with filter type 0 (none)
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, -1)], axis=1)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+def _tile_key(scenario, timestamp, registry=None):
+    """Directory-safe cache key for a scenario, zone data version and timestamp"""
+    registry = get_zone_registry() if registry is None else registry
+    scenario_key = scenario.lower().replace(' ', '_')
+    return scenario_key, registry.version, pd.Timestamp(timestamp).strftime('%Y%m%dT%H%M')
+
+def tile_dir(scenario, timestamp, root=TILE_ROOT, registry=None):
+    return os.path.join(root, *_tile_key(scenario, timestamp, registry))
+
+def render_heat_tiles(scenario, timestamp, field=None, zooms=DEFAULT_ZOOMS,
+                      bounds=DUBAI_BOUNDS, root=TILE_ROOT, value_range=TEMPERATURE_RANGE, registry=None):
+    """Render a temperature field to cached PNG tiles for several zoom levels
+
+    ``field(lat, lon)`` must accept arrays; by default it is the scenario's
+    simulated heat field. Each zoom level is evaluated as
+    one raster covering all of its tiles, then cut into 256 px tiles.
+    Pixels outside ``bounds`` are transparent. Tiles already on disk for
+    this scenario, zone data version and timestamp are left alone, so
+    changing the zones renders fresh tiles. After rendering new tiles the
+    scenario's stale pyramids (other zone versions, older timestamps) are
+    removed. Returns the tile directory.
+    """
+    base = tile_dir(scenario, timestamp, root, registry)
+    rendered = False
+    (south, west), (north, east) = bounds
+    if field is None:
+        field = lambda lat, lon: heat_island_temperature(lat, lon, scenario)
+
+    for zoom in zooms:
+        (x0, x1), (y0, y1) = tile_range(bounds, zoom)
+        paths = {(x, y): os.path.join(base, str(zoom), str(x), f"{y}.png")
+                 for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)}
+        if all(os.path.exists(path) for path in paths.values()):
+            continue
+
+        # Pixel-center coordinates for the whole zoom level at once
+        n = 2 ** zoom * TILE_SIZE
+        px = np.arange(x0 * TILE_SIZE, (x1 + 1) * TILE_SIZE) + 0.5
+        py = np.arange(y0 * TILE_SIZE, (y1 + 1) * TILE_SIZE) + 0.5
+        lons = px / n * 360.0 - 180.0
+        lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * py / n))))
+        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing='ij')
+
+        temperatures = np.asarray(field(lat_grid, lon_grid), dtype=np.float64)
+        outside = (lat_grid < south) | (lat_grid > north) | (lon_grid < west) | (lon_grid > east)
+        temperatures = np.where(outside, np.nan, temperatures)
+        raster = colorize(temperatures, value_range)
+
+        for (x, y), path in paths.items():
+            if os.path.exists(path):
+                continue
+            top, left = (y - y0) * TILE_SIZE, (x - x0) * TILE_SIZE
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as tile:
+                tile.write(encode_png(raster[top:top + TILE_SIZE, left:left + TILE_SIZE]))
+            rendered = True
+
+    if rendered:
+        _remove_stale_tiles(base)
+    return base
+
+def _remove_stale_tiles(base):
+    """Delete sibling pyramids of another zone version or an older timestamp"""
+    version_dir, time_key = os.path.split(base)
+    scenario_dir, version = os.path.split(version_dir)
+    for other in os.listdir(scenario_dir):
+        if other != version:
+            shutil.rmtree(os.path.join(scenario_dir, other), ignore_errors=True)
+    for other in os.listdir(version_dir):
+        if other < time_key:
+            shutil.rmtree(os.path.join(version_dir, other), ignore_errors=True)
+
+def add_heat_tile_layer(base_map, scenario, timestamp, url_root=TILE_URL_ROOT, zooms=DEFAULT_ZOOMS,
+                        bounds=DUBAI_BOUNDS, opacity=0.7, registry=None):
+    """Overlay cached heat tiles on a folium map as a TileLayer"""
+    scenario_key, version, time_key = _tile_key(scenario, timestamp, registry)
+    folium.TileLayer(
+        tiles=f"{url_root}/{scenario_key}/{version}/{time_key}/{{z}}/{{x}}/{{y}}.png",
+        attr='UWHIS heat model',
+        name='Temperature',
+        overlay=True,
+        opacity=opacity,
+        min_zoom=min(zooms),
+        max_native_zoom=max(zooms),
+        bounds=bounds
+    ).add_to(base_map)
+    return base_map
+
+# Test the functions
+if __name__ == "__main__":
+    import time
+
+    print("🔥 Testing heat tile rendering...")
+    started = time.perf_counter()
+    path = render_heat_tiles("UWHIS Activated", "2024-01-15 14:00", root='test_tiles')
+    count = sum(len(files) for _, _, files in os.walk(path))
+    print(f"✅ {count} tiles rendered to {path} in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,99 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+try:
+    from .map_viz import create_demo_map, add_scenario_markers
+    from .heat_tiles import render_heat_tiles, add_heat_tile_layer
+    from .zones import get_zone_registry, BUSINESS_AS_USUAL, UWHIS_ACTIVATED
+except ImportError:
+    from map_viz import create_demo_map, add_scenario_markers
+    from heat_tiles import render_heat_tiles, add_heat_tile_layer
+    from zones import get_zone_registry, BUSINESS_AS_USUAL, UWHIS_ACTIVATED
+
+# Where serialized scenario maps are kept between server restarts
+MAP_CACHE_DIR = os.path.join('data', 'map_cache')
+SCENARIOS = [BUSINESS_AS_USUAL, UWHIS_ACTIVATED]
+
+# Serialized maps kept in memory, most recently used last
+MEMORY_ENTRIES = 16
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+def build_scenario_map(scenario, timestamp=None, registry=None):
+    """Folium map for a scenario: base map, heat tiles and zone markers"""
+    demo_map = create_demo_map()
+    if timestamp is not None:
+        render_heat_tiles(scenario, timestamp, registry=registry)
+        add_heat_tile_layer(demo_map, scenario, timestamp, registry=registry)
+    return add_scenario_markers(demo_map, scenario, registry=registry)
+
+def _cache_name(scenario, version, timestamp):
+    scenario_key = scenario.lower().replace(' ', '_')
+    time_key = 'none' if timestamp is None else pd.Timestamp(timestamp).strftime('%Y%m%dT%H%M')
+    return f"{scenario_key}-{version}-{time_key}.html"
+
+def _remember(name, html):
+    with _lock:
+        _memory[name] = html
+        _memory.move_to_end(name)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+def scenario_map_html(scenario, timestamp=None, registry=None, cache_dir=MAP_CACHE_DIR):
+    """Serialized HTML of a scenario map, built at most once per zone version
+
+    Looks in memory, then on disk, and only then builds and serializes the
+    map. The key includes the zone registry's version, so changing zone
+    data produces a fresh map. Writing a new file removes the scenario's
+    stale ones: maps from other zone versions and maps of older hours.
+    """
+    registry = get_zone_registry() if registry is None else registry
+    name = _cache_name(scenario, registry.version, timestamp)
+
+    with _lock:
+        if name in _memory:
+            _memory.move_to_end(name)
+            return _memory[name]
+
+    path = os.path.join(cache_dir, name)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as cached:
+            html = cached.read()
+        _remember(name, html)
+        return html
+
+    html = build_scenario_map(scenario, timestamp, registry).get_root().render()
+
+    # Write atomically, then drop maps built from other zone data or older hours
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as output:
+        output.write(html)
+    os.replace(temporary, path)
+    scenario_key, _, time_key = name[:-len('.html')].split('-')
+    for old in os.listdir(cache_dir):
+        parts = old[:-len('.html')].split('-')
+        if not old.endswith('.html') or len(parts) != 3 or parts[0] != scenario_key:
+            continue
+        older = 'none' not in (time_key, parts[2]) and parts[2] < time_key
+        if parts[1] != registry.version or older:
+            os.remove(os.path.join(cache_dir, old))
+
+    _remember(name, html)
+    return html
+
+def build_map_cache(timestamp=None, scenarios=SCENARIOS, cache_dir=MAP_CACHE_DIR):
+    """Build step: serialize every scenario's map ahead of time"""
+    return {scenario: len(scenario_map_html(scenario, timestamp, cache_dir=cache_dir))
+            for scenario in scenarios}
+
+# Build the cache ahead of deployment
+if __name__ == "__main__":
+    from model import generate_synthetic_data
+
+    print("🗺️ Building scenario map cache...")
+    latest = generate_synthetic_data()['timestamp'].iloc[-1]
+    for scenario, size in build_map_cache(latest).items():
+        print(f"✅ {scenario}: {size / 1000:.0f} KB")
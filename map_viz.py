@@ -1,7 +1,56 @@
+import json
 import folium
 from folium import plugins
 import numpy as np
 
+try:
+    from .zones import get_zone_registry, ZONE_TYPES, OPTIMIZED, DUBAI_CENTER, DUBAI_BOUNDS, UWHIS_ACTIVATED
+    from .heat_sim import scenario_temperature
+except ImportError:
+    from zones import get_zone_registry, ZONE_TYPES, OPTIMIZED, DUBAI_CENTER, DUBAI_BOUNDS, UWHIS_ACTIVATED
+    from heat_sim import scenario_temperature
+
+# Most [lat, lon, temp] rows handed to a folium HeatMap
+HEATMAP_MAX_POINTS = 2500
+
+# Per-zone output levels for add_scenario_markers, most detailed first
+DETAIL_LEVELS = ('full', 'markers', 'points')
+
+# How add_scenario_markers emits zones
+RENDER_MODES = ('auto', 'clustered', 'individual')
+
+# Above this many zones, 'auto' rendering switches to one clustered layer
+MARKER_LIMIT = 200
+
+# Marker colors in the order the clustered layer indexes them
+MARKER_COLORS = ['red', 'orange', 'green', 'blue']
+
+# Builds each clustered marker in the browser from its data row:
+# [lat, lon, name, temperature, water usage, color index]
+CLUSTER_CALLBACK = """function (row) {
+    var colors = %(colors)s;
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 7, color: colors[row[5]], fillOpacity: 0.7
+    });
+    marker.bindTooltip(row[2] + ' - Click for details');
+    marker.bindPopup(function () {
+        return '<div style="width: 250px"><h4>' + row[2] + '</h4><hr>' +
+            '<p><b>Temperature:</b> ' + row[3].toFixed(1) + '°C</p>' +
+            '<p><b>Water Usage:</b> ' + row[4].toLocaleString('en-US') + ' L/day</p>' +
+            '<p><b>Scenario:</b> ' + %(scenario)s + '</p>' +
+            '<p><b>Status:</b> ' + (row[5] >= 2 ? 'Optimized' : 'Needs Attention') + '</p></div>';
+    }, {maxWidth: 300});
+    return marker;
+}"""
+
+# Marker icon per zone type
+ZONE_ICONS = {
+    'downtown': 'building',
+    'agricultural': 'industry',
+    'residential': 'home',
+    'industrial': 'industry'
+}
+
 def create_demo_map():
     """Create an interactive map of Dubai demonstration zones"""
     # Dubai coordinates
@@ -24,79 +73,116 @@ def create_demo_map():
     
     return demo_map
 
-def add_scenario_markers(base_map, scenario="UWHIS Activated"):
-    """Add markers based on scenario"""
-    
-    # Define zones with their data
-    zones = {
-        'downtown': {
-            'coords': [25.1972, 55.2744],
-            'name': 'Downtown District',
-            'temp': 42.5 if scenario == "Business as Usual" else 36.5,
-            'water_usage': 450000,
-            'color': 'red' if scenario == "Business as Usual" else 'green'
-        },
-        'agricultural': {
-            'coords': [25.1150, 55.3800],
-            'name': 'Agricultural Zone A',
-            'temp': 38.0,
-            'water_usage': 800000,
-            'color': 'orange' if scenario == "Business as Usual" else 'blue'
-        },
-        'residential': {
-            'coords': [25.2350, 55.2900],
-            'name': 'Residential Complex',
-            'temp': 40.0 if scenario == "Business as Usual" else 34.0,
-            'water_usage': 350000,
-            'color': 'red' if scenario == "Business as Usual" else 'green'
-        },
-        'industrial': {
-            'coords': [25.1500, 55.2500],
-            'name': 'Industrial Park',
-            'temp': 41.0,
-            'water_usage': 300000,
-            'color': 'orange'
-        }
-    }
+def _add_clustered_zones(base_map, registry, rows, scenario, temperatures, colors):
+    """Emit zones as one client-side marker cluster built from data rows"""
+    color_index = {color: index for index, color in enumerate(MARKER_COLORS)}
+    data = [
+        [round(float(lat), 5), round(float(lon), 5), str(name), round(float(temp), 1), int(water),
+         color_index[color]]
+        for lat, lon, name, temp, water, color in zip(
+            registry.lat[rows], registry.lon[rows], registry.names[rows],
+            temperatures[rows], registry.water_demand[rows], colors[rows]
+        )
+    ]
+    callback = CLUSTER_CALLBACK % {'colors': json.dumps(MARKER_COLORS), 'scenario': json.dumps(scenario)}
+    plugins.FastMarkerCluster(data, callback=callback, name='Zones').add_to(base_map)
+
+def add_scenario_markers(base_map, scenario="UWHIS Activated", registry=None, bounds=None, detail='full',
+                         render_mode='auto'):
+    """Add markers based on scenario
+
+    ``bounds`` ([[south, west], [north, east]]) limits output to zones in the
+    viewport. ``detail`` picks what each zone emits: 'full' (marker, popup
+    and water footprint circle), 'markers' (marker and popup only) or
+    'points' (a small colored dot with a tooltip).
+
+    ``render_mode`` 'individual' adds separate folium objects per zone;
+    'clustered' sends all zones as one FastMarkerCluster data array whose
+    markers and popups are built in the browser (``detail`` is ignored).
+    'auto' clusters once more than MARKER_LIMIT zones are in view.
+    """
+    if detail not in DETAIL_LEVELS:
+        raise ValueError(f"detail must be one of {DETAIL_LEVELS}, got {detail!r}")
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"render_mode must be one of {RENDER_MODES}, got {render_mode!r}")
+    registry = get_zone_registry() if registry is None else registry
+    
+    # Only zones inside the viewport are emitted
+    if bounds is None:
+        rows = np.arange(len(registry))
+    else:
+        (south, west), (north, east) = bounds
+        rows = registry.in_bbox(south, west, north, east)
+    
+    # Per-scenario values for every zone at once
+    temperatures = registry.temperatures(scenario)
+    colors = registry.colors(scenario)
+    optimized = registry.statuses(scenario) == OPTIMIZED
+    
+    if render_mode == 'auto':
+        render_mode = 'clustered' if len(rows) > MARKER_LIMIT else 'individual'
+    if render_mode == 'clustered':
+        _add_clustered_zones(base_map, registry, rows, scenario, temperatures, colors)
+        rows_individual = rows[:0]
+    else:
+        rows_individual = rows
     
     # Add zone markers
-    for zone_id, zone_data in zones.items():
+    for row in rows_individual:
+        coords = [registry.lat[row], registry.lon[row]]
+        name = registry.names[row]
+        water_usage = int(registry.water_demand[row])
+        
+        if detail == 'points':
+            folium.CircleMarker(
+                location=coords,
+                radius=4,
+                color=str(colors[row]),
+                fill=True,
+                fill_opacity=0.8,
+                tooltip=f"{name}: {temperatures[row]:.1f}°C"
+            ).add_to(base_map)
+            continue
+        
         # Create popup content
         popup_html = f"""
         <div style="width: 250px">
-            <h4>{zone_data['name']}</h4>
+            <h4>{name}</h4>
             <hr>
-            <p><b>Temperature:</b> {zone_data['temp']}°C</p>
-            <p><b>Water Usage:</b> {zone_data['water_usage']:,} L/day</p>
+            <p><b>Temperature:</b> {temperatures[row]:.1f}°C</p>
+            <p><b>Water Usage:</b> {water_usage:,} L/day</p>
             <p><b>Scenario:</b> {scenario}</p>
-            <p><b>Status:</b> {'Optimized' if zone_data['color'] in ['green', 'blue'] else 'Needs Attention'}</p>
+            <p><b>Status:</b> {'Optimized' if optimized[row] else 'Needs Attention'}</p>
         </div>
         """
         
         # Add marker
         folium.Marker(
-            location=zone_data['coords'],
+            location=coords,
             popup=folium.Popup(popup_html, max_width=300),
-            tooltip=f"{zone_data['name']} - Click for details",
+            tooltip=f"{name} - Click for details",
             icon=folium.Icon(
-                color=zone_data['color'],
-                icon='tint' if 'water' in zone_id else 'building' if 'downtown' in zone_id else 'home' if 'residential' in zone_id else 'industry',
+                color=str(colors[row]),
+                icon=ZONE_ICONS[ZONE_TYPES[registry.zone_types[row]]],
                 prefix='fa'
             )
         ).add_to(base_map)
         
+        if detail == 'markers':
+            continue
+        
         # Add circle for temperature visualization
         folium.Circle(
-            location=zone_data['coords'],
-            radius=zone_data['water_usage'] / 100,  # Scale for visibility
-            color=zone_data['color'],
+            location=coords,
+            radius=water_usage / 100,  # Scale for visibility
+            color=str(colors[row]),
             fill=True,
             fill_opacity=0.2,
-            popup=f"Water footprint: {zone_data['water_usage']:,} L/day"
+            popup=f"Water footprint: {water_usage:,} L/day"
         ).add_to(base_map)
     
     # Add heatmap layer for temperature
-    heat_data = [[zone['coords'][0], zone['coords'][1], zone['temp']] for zone in zones.values()]
+    heat_data = np.column_stack([registry.lat[rows], registry.lon[rows], temperatures[rows]]).round(4).tolist()
     plugins.HeatMap(heat_data, radius=25, blur=15, max_zoom=1).add_to(base_map)
     
     # Add legend
@@ -120,19 +206,63 @@ def add_scenario_markers(base_map, scenario="UWHIS Activated"):
     
     return base_map
 
-def create_temperature_heatmap():
+def heat_island_temperature(lat, lon, scenario=UWHIS_ACTIVATED):
+    """Simulated urban heat island temperature at any lat/lon (arrays ok)"""
+    # Steady state of the heat simulation engine for the scenario
+    return scenario_temperature(lat, lon, scenario)
+
+def temperature_grid(resolution=10, bounds=DUBAI_BOUNDS, scenario=UWHIS_ACTIVATED):
+    """Simulated temperature field on a regular lat/lon grid
+
+    ``resolution`` is points per side, or a (lat, lon) pair. Returns the
+    latitude and longitude axes and a (lat, lon) temperature array.
+    """
+    n_lat, n_lon = (resolution, resolution) if np.isscalar(resolution) else resolution
+    (south, west), (north, east) = bounds
+    lats = np.linspace(south, north, n_lat)
+    lons = np.linspace(west, east, n_lon)
+    
+    # Simulate urban heat island effect
+    lat_grid, lon_grid = np.meshgrid(lats, lons, indexing='ij')
+    temperatures = heat_island_temperature(lat_grid, lon_grid, scenario)
+    
+    return lats, lons, temperatures
+
+def _block_mean(values, factor):
+    """Average non-overlapping factor x factor blocks (edges padded with NaN)"""
+    n, m = values.shape
+    padded = np.full((-(-n // factor) * factor, -(-m // factor) * factor), np.nan)
+    padded[:n, :m] = values
+    blocks = padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor)
+    return np.nanmean(blocks, axis=(1, 3))
+
+def heatmap_points(lats, lons, temperatures, max_points=HEATMAP_MAX_POINTS):
+    """Flatten a grid into [lat, lon, temp] rows, aggregated to a point budget
+
+    Grids over the budget are reduced by averaging square blocks, so the
+    payload handed to folium never exceeds ``max_points`` rows.
+    """
+    n, m = temperatures.shape
+    factor = max(1, int(np.ceil(np.sqrt(temperatures.size / max_points))))
+    while -(-n // factor) * -(-m // factor) > max_points:
+        factor += 1
+    if factor > 1:
+        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing='ij')
+        lat_grid = _block_mean(lat_grid, factor)
+        lon_grid = _block_mean(lon_grid, factor)
+        temperatures = _block_mean(temperatures, factor)
+    else:
+        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing='ij')
+    
+    return np.column_stack([lat_grid.ravel(), lon_grid.ravel(), temperatures.ravel()]).round(5).tolist()
+
+def create_temperature_heatmap(resolution=10, bounds=DUBAI_BOUNDS, max_points=HEATMAP_MAX_POINTS,
+                               scenario=UWHIS_ACTIVATED):
     """Create a dedicated temperature heatmap"""
-    # This could be enhanced with real temperature data
-    dubai_map = folium.Map([25.2048, 55.2708], zoom_start=11)
-    
-    # Simulate temperature grid
-    temperature_points = []
-    for lat in np.linspace(25.10, 25.30, 10):
-        for lon in np.linspace(55.20, 55.40, 10):
-            # Simulate urban heat island effect (hotter in center)
-            center_dist = np.sqrt((lat-25.2048)**2 + (lon-55.2708)**2)
-            temp = 42 - center_dist * 100  # Hotter in center
-            temperature_points.append([lat, lon, temp])
+    dubai_map = folium.Map(DUBAI_CENTER, zoom_start=11)
+    
+    lats, lons, temperatures = temperature_grid(resolution, bounds, scenario)
+    temperature_points = heatmap_points(lats, lons, temperatures, max_points)
     
     plugins.HeatMap(temperature_points, radius=20, blur=15).add_to(dubai_map)
     
@@ -1,71 +1,365 @@
+import os
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 
-def generate_synthetic_data():
-    """Generate realistic synthetic data for Dubai simulation"""
-    np.random.seed(42)  # For reproducible results
-    
-    # Generate 7 days of hourly data
-    dates = pd.date_range('2024-01-15', periods=168, freq='H')
+try:
+    from .storage import write_timeseries
+except ImportError:
+    from storage import write_timeseries
+
+# Root seed for all synthetic randomness
+DEFAULT_SEED = 42
+
+# Bump whenever the synthetic data recipe changes (invalidates app caches)
+DATA_VERSION = 1
+
+# Sector shares of total water demand
+SECTOR_SHARES = {
+    'residential_water': 0.45,  # 45%
+    'agricultural_water': 0.35,  # 35%
+    'industrial_water': 0.20    # 20%
+}
+
+def _synthetic_frame(dates, temp_noise, water_noise, dtype=np.float64):
+    """Build the synthetic columns for a block of timestamps"""
+    # Position within the day drives the temperature and solar cycles
+    hour_of_day = ((dates - dates.normalize()) / pd.Timedelta(hours=1)).to_numpy()
     
     # Create realistic temperature pattern (hot during day, cooler at night)
     base_temp = 35
-    daily_cycle = 8 * np.sin(2 * np.pi * np.arange(168) / 24 - np.pi/2)
-    temp_noise = np.random.normal(0, 2, 168)
+    daily_cycle = 8 * np.sin(2 * np.pi * hour_of_day / 24 - np.pi/2)
     temperatures = base_temp + daily_cycle + temp_noise
     
     # Water demand increases with temperature
     base_water = 1000
-    water_demand = base_water + temperatures * 25 + np.random.normal(0, 50, 168)
+    water_demand = base_water + temperatures * 25 + water_noise
     
-    # Split into sectors
-    residential_share = 0.45  # 45%
-    agricultural_share = 0.35  # 35%
-    industrial_share = 0.20    # 20%
-    
-    synthetic_data = pd.DataFrame({
-        'timestamp': dates,
+    columns = {
         'temperature': temperatures,
         'total_water_demand': water_demand,
-        'residential_water': water_demand * residential_share,
-        'agricultural_water': water_demand * agricultural_share,
-        'industrial_water': water_demand * industrial_share,
-        'solar_power': 300 + 200 * np.sin(2 * np.pi * np.arange(168) / 24),  # More solar during day
-        'energy_consumption': 500 + temperatures * 10
-    })
+    }
+    # Split into sectors
+    for column, share in SECTOR_SHARES.items():
+        columns[column] = water_demand * share
+    columns['solar_power'] = 300 + 200 * np.sin(2 * np.pi * hour_of_day / 24)  # More solar during day
+    columns['energy_consumption'] = 500 + temperatures * 10
     
-    return synthetic_data
+    frame = pd.DataFrame({'timestamp': dates})
+    for column, values in columns.items():
+        frame[column] = values.astype(dtype, copy=False)
+    return frame
 
-def predict_water_demand(temperature, time_of_day, day_type='weekday'):
-    """Predict water demand based on conditions"""
-    # Base model - you can make this more sophisticated
-    base_demand = 1000
+def _chunk_rng(seed, zone, chunk):
+    """Independent random stream for one (zone, chunk) pair
+
+    Same stream as SeedSequence(seed).spawn(...)[zone].spawn(...)[chunk],
+    built directly so any worker process can recreate it on its own.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(zone, chunk)))
+
+def generate_synthetic_data(seed=DEFAULT_SEED):
+    """Generate realistic synthetic data for Dubai simulation"""
+    rng = np.random.default_rng(np.random.SeedSequence(seed))  # For reproducible results
     
-    # Temperature effect (more heat = more water needed)
-    temp_effect = temperature * 25
+    # Generate 7 days of hourly data
+    dates = pd.date_range('2024-01-15', periods=168, freq='h')
+    temp_noise = rng.normal(0, 2, 168)
+    water_noise = rng.normal(0, 50, 168)
     
-    # Time of day effect (peak usage times)
-    if 7 <= time_of_day <= 9:  # Morning peak
-        time_effect = 300
-    elif 18 <= time_of_day <= 21:  # Evening peak
-        time_effect = 400
-    else:
-        time_effect = 0
+    return _synthetic_frame(dates, temp_noise, water_noise)
+
+def _zone_chunks(zone, start, periods, freq, chunk_size, dtype, seed):
+    """Yield the chunks for a single zone"""
+    step = pd.tseries.frequencies.to_offset(freq)
+    start = pd.Timestamp(start)
     
-    # Day type effect
-    if day_type == 'weekend':
-        day_effect = 200
+    for chunk, offset in enumerate(range(0, periods, chunk_size)):
+        rng = _chunk_rng(seed, zone, chunk)
+        rows = min(chunk_size, periods - offset)
+        dates = pd.date_range(start + offset * step, periods=rows, freq=step)
+        temp_noise = rng.normal(0, 2, rows)
+        water_noise = rng.normal(0, 50, rows)
+        
+        frame = _synthetic_frame(dates, temp_noise, water_noise, dtype)
+        frame.insert(0, 'zone', np.full(rows, zone, dtype=np.int32))
+        yield frame
+
+def generate_synthetic_data_chunks(n_zones=1, start='2024-01-15', periods=168, freq='h',
+                                   chunk_size=24 * 7, dtype=np.float64, seed=DEFAULT_SEED):
+    """Yield synthetic data in fixed-size chunks per zone and time range
+
+    Each chunk is a DataFrame of at most ``chunk_size`` rows for a single
+    zone, so memory stays bounded however many zones and periods are asked
+    for. Chunks come out zone by zone in time order. Every chunk draws from
+    its own spawned random stream, so output depends only on ``seed`` and
+    ``chunk_size``, never on call order.
+    """
+    for zone in range(n_zones):
+        yield from _zone_chunks(zone, start, periods, freq, chunk_size, dtype, seed)
+
+def _zone_frame(zone, start, periods, freq, chunk_size, dtype, seed):
+    """Generate one zone's full frame (process pool worker)"""
+    return pd.concat(list(_zone_chunks(zone, start, periods, freq, chunk_size, dtype, seed)),
+                     ignore_index=True)
+
+def generate_zones_parallel(n_zones=1, start='2024-01-15', periods=168, freq='h',
+                            chunk_size=24 * 7, dtype=np.float64, seed=DEFAULT_SEED,
+                            max_workers=None):
+    """Generate many zones across a process pool
+
+    Output is bit-identical to concatenating generate_synthetic_data_chunks
+    with the same arguments, whatever the number of workers.
+    """
+    args = (start, periods, freq, chunk_size, dtype, seed)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        frames = list(pool.map(_zone_frame, range(n_zones), *[[arg] * n_zones for arg in args]))
+    return pd.concat(frames, ignore_index=True)
+
+# Peak usage windows (inclusive hour ranges)
+MORNING_PEAK = (7, 9)
+EVENING_PEAK = (18, 21)
+
+# Stream for prediction noise, kept apart from the global NumPy state
+_prediction_rng = np.random.default_rng()
+
+def predict_water_demand_batch(temperature, time_of_day=None, day_type='weekday', noise=True, rng=None,
+                               model=None):
+    """Predict water demand for many conditions in one vectorized pass
+
+    Takes NumPy arrays (broadcast against each other) or a DataFrame with
+    'temperature', 'hour' and optional 'day_type' columns. Hours and day
+    types missing from a DataFrame are taken from its 'timestamp' column.
+    Noise is drawn from ``rng`` when given. A fitted DemandModel passed as
+    ``model`` replaces the hand-tuned formula.
+    """
+    if model is not None:
+        predicted_demand = model.predict(temperature, time_of_day, day_type)
     else:
-        day_effect = 0
-    
-    predicted_demand = base_demand + temp_effect + time_effect + day_effect
-    
+        temperature, time_of_day, day_type = _conditions(temperature, time_of_day, day_type)
+        predicted_demand = _rule_based_demand(temperature, time_of_day, day_type)
+
     # Add some randomness for realism
-    predicted_demand += np.random.normal(0, 50)
-    
-    return int(predicted_demand)
+    if noise:
+        rng = _prediction_rng if rng is None else rng
+        predicted_demand = predicted_demand + rng.normal(0, 50, predicted_demand.shape)
+
+    return predicted_demand
+
+def _conditions(temperature, time_of_day=None, day_type='weekday'):
+    """Normalize arrays or a DataFrame of conditions into broadcast arrays"""
+    if isinstance(temperature, pd.DataFrame):
+        conditions = temperature
+        temperature = conditions['temperature'].to_numpy()
+        if 'hour' in conditions:
+            time_of_day = conditions['hour'].to_numpy()
+        else:
+            time_of_day = conditions['timestamp'].dt.hour.to_numpy()
+        if 'day_type' in conditions:
+            day_type = conditions['day_type'].to_numpy()
+        elif 'timestamp' in conditions:
+            day_type = np.where(conditions['timestamp'].dt.dayofweek >= 5, 'weekend', 'weekday')
+
+    temperature, time_of_day, day_type = np.broadcast_arrays(
+        np.asarray(temperature, dtype=np.float64),
+        np.asarray(time_of_day),
+        np.asarray(day_type)
+    )
+
+    return temperature, time_of_day, day_type
+
+def _rule_based_demand(temperature, time_of_day, day_type):
+    """Hand-tuned demand formula used when no trained model is given"""
+    # Base model
+    base_demand = 1000
+
+    # Temperature effect (more heat = more water needed)
+    temp_effect = temperature * 25
+
+    # Time of day effect (peak usage times)
+    morning = (time_of_day >= MORNING_PEAK[0]) & (time_of_day <= MORNING_PEAK[1])
+    evening = (time_of_day >= EVENING_PEAK[0]) & (time_of_day <= EVENING_PEAK[1])
+    time_effect = np.where(morning, 300, np.where(evening, 400, 0))
+
+    # Day type effect
+    day_effect = np.where(day_type == 'weekend', 200, 0)
+
+    return base_demand + temp_effect + time_effect + day_effect
+
+def predict_water_demand(temperature, time_of_day, day_type='weekday', rng=None, model=None):
+    """Predict water demand based on conditions"""
+    return int(predict_water_demand_batch(temperature, time_of_day, day_type, rng=rng, model=model))
+
+# Where the trained demand model is persisted
+DEFAULT_MODEL_PATH = os.path.join('data', 'demand_model.npz')
+
+FEATURE_NAMES = ['temperature', 'hour_sin', 'hour_cos', 'morning_peak', 'evening_peak', 'weekend']
+
+def demand_features(temperature, time_of_day=None, day_type='weekday'):
+    """Feature matrix for the demand model (same inputs as the predictor)"""
+    temperature, time_of_day, day_type = _conditions(temperature, time_of_day, day_type)
+    angle = 2 * np.pi * time_of_day.astype(np.float64) / 24
+    features = np.stack([
+        temperature,
+        np.sin(angle),
+        np.cos(angle),
+        (time_of_day >= MORNING_PEAK[0]) & (time_of_day <= MORNING_PEAK[1]),
+        (time_of_day >= EVENING_PEAK[0]) & (time_of_day <= EVENING_PEAK[1]),
+        day_type == 'weekend'
+    ], axis=-1)
+    return features.astype(np.float64)
+
+class DemandModel:
+    """Linear water demand model trained on historical frames
+
+    ``fit`` trains with scikit-learn's LinearRegression. The model also keeps
+    the least-squares sufficient statistics, so ``partial_fit`` can fold in
+    new frames without revisiting old ones. Prediction is a plain
+    coefficient dot-product and never touches scikit-learn.
+    """
+
+    def __init__(self):
+        self.coef = None
+        self.intercept = 0.0
+        self.n_samples = 0
+        self.version = 0
+        # X'X and X'y over [1, features], accumulated across all fits
+        self._xtx = np.zeros((len(FEATURE_NAMES) + 1, len(FEATURE_NAMES) + 1))
+        self._xty = np.zeros(len(FEATURE_NAMES) + 1)
+
+    @staticmethod
+    def _training_arrays(data, target):
+        return demand_features(data), data[target].to_numpy(dtype=np.float64)
+
+    def _accumulate(self, X, y):
+        design = np.column_stack([np.ones(len(X)), X])
+        self._xtx += design.T @ design
+        self._xty += design.T @ y
+        self.n_samples += len(X)
+
+    def fit(self, data, target='total_water_demand'):
+        """Train from scratch on a frame with temperature and timestamp columns"""
+        X, y = self._training_arrays(data, target)
+        regression = LinearRegression().fit(X, y)
+
+        self._xtx[:] = 0
+        self._xty[:] = 0
+        self.n_samples = 0
+        self._accumulate(X, y)
+
+        self.coef = regression.coef_
+        self.intercept = float(regression.intercept_)
+        self.version += 1
+        return self
+
+    def partial_fit(self, data, target='total_water_demand'):
+        """Update the fit with newly arrived rows"""
+        X, y = self._training_arrays(data, target)
+        self._accumulate(X, y)
+
+        solution = np.linalg.lstsq(self._xtx, self._xty, rcond=None)[0]
+        self.intercept = float(solution[0])
+        self.coef = solution[1:]
+        self.version += 1
+        return self
+
+    def predict(self, temperature, time_of_day=None, day_type='weekday'):
+        """Predicted demand for arrays or a DataFrame of conditions"""
+        if self.coef is None:
+            raise ValueError("DemandModel must be fitted before predicting")
+        return demand_features(temperature, time_of_day, day_type) @ self.coef + self.intercept
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        """Persist coefficients and training statistics"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, coef=self.coef, intercept=self.intercept, n_samples=self.n_samples,
+                 version=self.version, xtx=self._xtx, xty=self._xty)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        """Restore a model saved with ``save``"""
+        model = cls()
+        with np.load(path) as saved:
+            model.coef = saved['coef']
+            model.intercept = float(saved['intercept'])
+            model.n_samples = int(saved['n_samples'])
+            model.version = int(saved['version'])
+            model._xtx = saved['xtx']
+            model._xty = saved['xty']
+        return model
+
+def load_or_train_model(path=DEFAULT_MODEL_PATH, data=None):
+    """Warm-start from disk, training and saving a model if none exists"""
+    if os.path.exists(path):
+        return DemandModel.load(path)
+
+    model = DemandModel().fit(generate_synthetic_data() if data is None else data)
+    model.save(path)
+    return model
+
+# Input grid covered by the prediction lookup table
+LOOKUP_TEMPERATURES = np.arange(30, 51)
+LOOKUP_HOURS = np.arange(24)
+LOOKUP_DAY_TYPES = ['weekday', 'weekend']
+
+def _model_signature(model):
+    """Identifies the coefficients a lookup table was built from"""
+    if model is None:
+        return None
+    return (tuple(np.round(model.coef, 12)), round(model.intercept, 12))
+
+class DemandLookup:
+    """Precomputed, noise-free demand for every widget input
+
+    The city-wide table covers LOOKUP_DAY_TYPES x LOOKUP_HOURS x
+    LOOKUP_TEMPERATURES. Each zone gets the same table scaled by its demand
+    factor. ``refresh`` rebuilds only when the model's coefficients change,
+    and zone tables are derived from the city table on first use.
+    """
+
+    def __init__(self, model=None, zone_factors=None):
+        self._signature = object()
+        self._zone_factors = dict(zone_factors or {})
+        self._zone_tables = {}
+        self.refresh(model)
+
+    def refresh(self, model=None):
+        """Rebuild the table if ``model`` differs from the one it was built with"""
+        signature = _model_signature(model)
+        if signature == self._signature:
+            return False
+
+        temperature, hour, day_type = np.meshgrid(
+            LOOKUP_TEMPERATURES, LOOKUP_HOURS, LOOKUP_DAY_TYPES, indexing='ij'
+        )
+        table = predict_water_demand_batch(temperature, hour, day_type, noise=False, model=model)
+        # Stored as (day_type, hour, temperature) float32
+        self._table = np.ascontiguousarray(table.transpose(2, 1, 0), dtype=np.float32)
+        self._zone_tables = {}
+        self._signature = signature
+        return True
+
+    def set_zone_factor(self, zone, factor):
+        """Add or change one zone's demand factor, leaving other zones untouched"""
+        self._zone_factors[zone] = factor
+        self._zone_tables.pop(zone, None)
+
+    def table(self, zone=None):
+        """Full lookup array for the city (zone=None) or a single zone"""
+        if zone is None:
+            return self._table
+        if zone not in self._zone_tables:
+            self._zone_tables[zone] = self._table * np.float32(self._zone_factors[zone])
+        return self._zone_tables[zone]
+
+    def lookup(self, temperature, time_of_day, day_type='weekday', zone=None):
+        """Demand for scalar or array inputs, snapped to the grid"""
+        t = np.clip(np.rint(temperature).astype(int), LOOKUP_TEMPERATURES[0], LOOKUP_TEMPERATURES[-1])
+        h = np.asarray(time_of_day, dtype=int) % 24
+        d = (np.asarray(day_type) == 'weekend').astype(int)
+        return self.table(zone)[d, h, t - LOOKUP_TEMPERATURES[0]]
 
 def calculate_water_savings(uwhis_active=True):
     """Calculate water savings from UWHIS"""
@@ -87,9 +381,12 @@ def calculate_water_savings(uwhis_active=True):
 # Generate and save the data
 if __name__ == "__main__":
     data = generate_synthetic_data()
-    data.to_csv('data/synthetic_data.csv', index=False)
+    write_timeseries(data)
+    demand_model = DemandModel().fit(data)
+    demand_model.save()
     print("✅ Data generated successfully!")
     print(f"📊 Data shape: {data.shape}")
     print(f"📅 Date range: {data['timestamp'].min()} to {data['timestamp'].max()}")
     print(f"🔥 Max temperature: {data['temperature'].max():.1f}°C")
-    print(f"💧 Average water demand: {data['total_water_demand'].mean():.0f} L/hour")
\ No newline at end of file
+    print(f"💧 Average water demand: {data['total_water_demand'].mean():.0f} L/hour")
+    print(f"🤖 Demand model trained on {demand_model.n_samples} rows, saved to {DEFAULT_MODEL_PATH}")
\ No newline at end of file
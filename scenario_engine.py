@@ -0,0 +1,252 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+try:
+    from .model import generate_synthetic_data, SECTOR_SHARES, DEFAULT_SEED
+    from .storage import has_data, read_recent
+    from .heat_sim import intensity_reduction, SCENARIO_INTENSITY
+    from .zones import BUSINESS_AS_USUAL, UWHIS_ACTIVATED
+except ImportError:
+    from model import generate_synthetic_data, SECTOR_SHARES, DEFAULT_SEED
+    from storage import has_data, read_recent
+    from heat_sim import intensity_reduction, SCENARIO_INTENSITY
+    from zones import BUSINESS_AS_USUAL, UWHIS_ACTIVATED
+
+# Hourly inputs the engine reads from the time series
+PROFILE_COLUMNS = ['total_water_demand', 'energy_consumption', 'solar_power']
+SECTORS = ['residential', 'agricultural', 'industrial']
+
+# City-wide constants
+CITY_SCALE = 17.3                 # demo-zone water series -> city-wide volume
+WATER_COST_PER_LITER = 0.0375     # AED per liter supplied (desalination + pumping)
+COOLING_MW_PER_DEGREE = 10.0      # cooling load avoided per °C of heat-island cooling
+GRID_EMISSIONS = 0.4              # tons CO₂ per MWh drawn from the grid
+
+# Parameter sets, one value per configuration
+PARAMETERS = [
+    'delivery_efficiency',     # share of supplied water reaching end use
+    'residential_savings',     # share of each sector's demand avoided
+    'agricultural_savings',
+    'industrial_savings',
+    'energy_savings',          # share of energy use avoided by optimization
+    'solar_capacity',          # multiple of the solar series available
+    'intervention_intensity'   # heat intervention intensity (see heat_sim)
+]
+
+SCENARIO_PARAMETERS = {
+    BUSINESS_AS_USUAL: {
+        'delivery_efficiency': 0.65,
+        'residential_savings': 0.0,
+        'agricultural_savings': 0.0,
+        'industrial_savings': 0.0,
+        'energy_savings': 0.0,
+        'solar_capacity': 0.42,
+        'intervention_intensity': SCENARIO_INTENSITY[BUSINESS_AS_USUAL]
+    },
+    UWHIS_ACTIVATED: {
+        'delivery_efficiency': 0.88,
+        'residential_savings': 0.20,
+        'agricultural_savings': 0.35,
+        'industrial_savings': 0.15,
+        'energy_savings': 0.18,
+        'solar_capacity': 1.4,
+        'intervention_intensity': SCENARIO_INTENSITY[UWHIS_ACTIVATED]
+    }
+}
+
+def daily_profile(data=None, columns=PROFILE_COLUMNS):
+    """Mean value per hour of day of the given columns, shape (24,) each
+
+    Without ``data`` the last week in the store is used, or the synthetic
+    data when the store is empty.
+    """
+    if data is None:
+        data = read_recent(168, columns) if has_data() else generate_synthetic_data()
+    hours = pd.to_datetime(data['timestamp']).dt.hour.to_numpy()
+    return {column: np.bincount(hours, data[column].to_numpy(), 24) / np.bincount(hours, minlength=24)
+            for column in columns}
+
+def parameter_sets(*scenarios, **values):
+    """Column arrays of parameter sets
+
+    Named scenarios contribute one set each; keyword arrays (e.g. from
+    ``parameter_grid``) are appended after them. Parameters missing from the
+    keywords fall back to the Business as Usual values.
+    """
+    rows = [SCENARIO_PARAMETERS[name] for name in scenarios]
+    sizes = {np.size(value) for value in values.values()} or {0}
+    if len(sizes) > 1:
+        raise ValueError("Parameter arrays must all have the same length")
+    count = sizes.pop()
+    return {
+        name: np.concatenate([
+            [row[name] for row in rows],
+            np.broadcast_to(values.get(name, SCENARIO_PARAMETERS[BUSINESS_AS_USUAL][name]), count)
+        ]).astype(np.float64)
+        for name in PARAMETERS
+    }
+
+def parameter_grid(**axes):
+    """Every combination of the given parameter values, as column arrays"""
+    names = list(axes)
+    combinations = np.array(list(itertools.product(*(np.atleast_1d(axes[name]) for name in names))))
+    return {name: combinations[:, i] for i, name in enumerate(names)}
+
+def evaluate_scenarios(parameters, profile=None, sector_shares=None):
+    """Evaluate many parameter sets against one hourly profile in one pass
+
+    ``parameters`` maps each name in PARAMETERS to an array with one value
+    per configuration; ``profile`` maps PROFILE_COLUMNS to 24 hourly values,
+    or to a (configurations, 24) array each. ``sector_shares`` overrides
+    SECTOR_SHARES, again either shared or one row per configuration.
+    Every metric is computed on a (configurations, hours) grid at once.
+
+    Returns a DataFrame with one row per configuration and numeric columns:
+    water_efficiency and renewable_energy_usage (%), energy_consumption
+    (MW), temperature_reduction (°C), total_water_used (L/day),
+    cost_per_day (AED), co2_emissions (tons/day) and the water distribution
+    per sector (% of supply).
+    """
+    profile = daily_profile() if profile is None else profile
+    p = {name: np.asarray(parameters[name], dtype=np.float64)[:, None] for name in PARAMETERS}
+    demand, energy, solar = (np.atleast_2d(np.asarray(profile[column], dtype=np.float64))
+                             for column in PROFILE_COLUMNS)
+    demand = demand * CITY_SCALE
+    shares = list(SECTOR_SHARES.values()) if sector_shares is None else sector_shares
+    shares = np.atleast_2d(np.asarray(shares, dtype=np.float64))
+
+    # Water: sector use after savings, grossed up for delivery losses
+    daily_demand = demand.sum(axis=1)
+    sector_supply = np.stack([
+        daily_demand * shares[:, i] * (1 - p[f"{sector}_savings"][:, 0]) / p['delivery_efficiency'][:, 0]
+        for i, sector in enumerate(SECTORS)
+    ], axis=1)
+    supplied = sector_supply.sum(axis=1)
+
+    # Energy: optimization savings plus the cooling load the heat interventions remove
+    cooling = intensity_reduction(p['intervention_intensity'])
+    load = np.maximum(energy * (1 - p['energy_savings']) - COOLING_MW_PER_DEGREE * cooling, 0)
+    renewable = np.minimum(solar * p['solar_capacity'], load)
+    grid_mwh = (load - renewable).sum(axis=1)
+
+    results = pd.DataFrame({
+        'water_efficiency': p['delivery_efficiency'][:, 0] * 100,
+        'energy_consumption': load.mean(axis=1),
+        'temperature_reduction': cooling[:, 0],
+        'renewable_energy_usage': renewable.sum(axis=1) / load.sum(axis=1) * 100,
+        'total_water_used': supplied,
+        'cost_per_day': supplied * WATER_COST_PER_LITER,
+        'co2_emissions': grid_mwh * GRID_EMISSIONS
+    })
+    for i, sector in enumerate(SECTORS):
+        results[f"{sector}_share"] = sector_supply[:, i] / supplied * 100
+    return results
+
+def evaluate_scenario(scenario, profile=None):
+    """Numeric results of one named scenario, as a dict"""
+    return evaluate_scenarios(parameter_sets(scenario), profile).iloc[0].to_dict()
+
+# Monte Carlo input uncertainty
+TEMPERATURE_NOISE = 1.5          # °C standard deviation of the day's mean temperature
+DEMAND_ELASTICITY = (25.0, 6.0)  # mean and std of L/hour of demand per °C
+SHARE_CONCENTRATION = 200.0      # Dirichlet concentration around SECTOR_SHARES
+SOLAR_AVAILABILITY = (0.75, 1.05)  # uniform range scaling the solar profile (dust, haze)
+EFFICIENCY_NOISE = 0.03          # std of the delivery efficiency each scenario achieves
+INTERVENTION_EFFECTIVENESS = (0.7, 1.1)  # uniform range scaling intervention intensity
+BENEFIT_METRICS = ['water_savings', 'energy_savings', 'cost_savings', 'co2_reduction',
+                   'temperature_reduction']
+
+def _benefits(baseline, optimized):
+    """Benefit metrics of optimized over baseline results (aligned rows)"""
+    return pd.DataFrame({
+        'water_savings': optimized['water_efficiency'] - baseline['water_efficiency'],
+        'energy_savings': baseline['energy_consumption'] - optimized['energy_consumption'],
+        'cost_savings': baseline['cost_per_day'] - optimized['cost_per_day'],
+        'co2_reduction': baseline['co2_emissions'] - optimized['co2_emissions'],
+        'temperature_reduction': optimized['temperature_reduction'] - baseline['temperature_reduction']
+    })
+
+def _benefit_batch(args):
+    """Sample one batch of uncertain inputs and score both scenarios (pool worker)"""
+    profile, baseline, optimized, draws, seed, batch = args
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(batch,)))
+
+    # Uncertain inputs, one row per draw
+    temperature = rng.normal(0, TEMPERATURE_NOISE, (draws, 1))
+    elasticity = rng.normal(*DEMAND_ELASTICITY, (draws, 1))
+    shares = rng.dirichlet(SHARE_CONCENTRATION * np.array(list(SECTOR_SHARES.values())), draws)
+    solar = rng.uniform(*SOLAR_AVAILABILITY, (draws, 1))
+    efficiency = rng.normal(0, EFFICIENCY_NOISE, 2 * draws)
+    effectiveness = np.tile(rng.uniform(*INTERVENTION_EFFECTIVENESS, draws), 2)
+    sampled = {
+        'total_water_demand': profile['total_water_demand'] + elasticity * temperature,
+        'energy_consumption': profile['energy_consumption'] + COOLING_MW_PER_DEGREE * temperature,
+        'solar_power': profile['solar_power'] * solar
+    }
+
+    # Both scenarios see the same draws, so their difference is paired; each
+    # achieves its own delivery efficiency, with interventions equally effective
+    parameters = parameter_sets(**{name: np.repeat([baseline[name], optimized[name]], draws) for name in PARAMETERS})
+    parameters['delivery_efficiency'] = np.clip(parameters['delivery_efficiency'] + efficiency, 0.3, 0.99)
+    parameters['intervention_intensity'] = parameters['intervention_intensity'] * effectiveness
+    results = evaluate_scenarios(
+        parameters,
+        {column: np.tile(values, (2, 1)) for column, values in sampled.items()},
+        np.tile(shares, (2, 1))
+    )
+    return _benefits(results.iloc[:draws].reset_index(drop=True),
+                     results.iloc[draws:].reset_index(drop=True)).to_numpy()
+
+def monte_carlo_benefits(baseline=BUSINESS_AS_USUAL, optimized=UWHIS_ACTIVATED, draws=20000,
+                         percentiles=(5, 50, 95), profile=None, seed=DEFAULT_SEED, batch_size=5000,
+                         max_workers=None):
+    """Percentile bands of the benefit metrics under uncertain inputs
+
+    Samples temperature noise, demand elasticity, sector shares, solar
+    availability, the delivery efficiency each scenario achieves and how
+    effective the heat interventions turn out. Each batch of ``batch_size`` draws is evaluated as one
+    vectorized pass and batches are spread across a process pool. Batch
+    ``b`` always uses the random stream SeedSequence(seed, spawn_key=(b,)),
+    so the bands depend only on ``seed`` and ``draws``, not on the worker
+    count.
+
+    Returns a DataFrame indexed by BENEFIT_METRICS with one column per
+    percentile (e.g. 'p5', 'p50', 'p95').
+    """
+    profile = daily_profile() if profile is None else profile
+    intensity_reduction(1.0)  # warm the heat simulation cache before forking workers
+    tasks = [(profile, SCENARIO_PARAMETERS[baseline], SCENARIO_PARAMETERS[optimized],
+              min(batch_size, draws - start), seed, batch)
+             for batch, start in enumerate(range(0, draws, batch_size))]
+    if len(tasks) == 1 or max_workers == 1:
+        samples = [_benefit_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            samples = list(pool.map(_benefit_batch, tasks))
+
+    bands = np.percentile(np.concatenate(samples), percentiles, axis=0)
+    return pd.DataFrame(bands.T, index=BENEFIT_METRICS, columns=[f"p{p:g}" for p in percentiles])
+
+# Test the functions
+if __name__ == "__main__":
+    import time
+
+    print("⚙️ Testing scenario engine...")
+    profile = daily_profile(generate_synthetic_data())
+    print(evaluate_scenarios(parameter_sets(BUSINESS_AS_USUAL, UWHIS_ACTIVATED), profile).round(1).T)
+    sweep = parameter_sets(**parameter_grid(
+        delivery_efficiency=np.linspace(0.6, 0.95, 8),
+        agricultural_savings=np.linspace(0, 0.4, 5),
+        energy_savings=np.linspace(0, 0.3, 4),
+        intervention_intensity=np.linspace(0, 1, 5)
+    ))
+    started = time.perf_counter()
+    results = evaluate_scenarios(sweep, profile)
+    print(f"✅ {len(results)} configurations in {(time.perf_counter() - started) * 1000:.1f}ms")
+    started = time.perf_counter()
+    bands = monte_carlo_benefits(draws=50000, profile=profile)
+    print(bands.round(1))
+    print(f"✅ 50,000 Monte Carlo draws in {time.perf_counter() - started:.2f}s, "
+          f"serial identical={bands.equals(monte_carlo_benefits(draws=50000, profile=profile, max_workers=1))}")
@@ -0,0 +1,355 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Default location of the columnar time-series store
+DEFAULT_STORE = os.path.join('data', 'store')
+
+# Rollup levels kept next to the raw partitions, finest first
+ROLLUP_LEVELS = {
+    'hour': pd.Timedelta(hours=1),
+    'day': pd.Timedelta(days=1),
+    'week': pd.Timedelta(weeks=1)
+}
+ROLLUP_STATS = ['sum', 'min', 'max']
+
+# Each level's buckets are stored in segments of this period, so a write
+# rewrites at most a month of hours, a year of days and a year of weeks
+ROLLUP_SEGMENTS = {
+    'hour': 'month',
+    'day': 'year',
+    'week': 'year'
+}
+
+# Default number of points a rollup query may return
+DEFAULT_POINT_BUDGET = 200
+
+def _partition_path(root, zone, day):
+    """Directory holding one zone's rows for one day"""
+    return os.path.join(root, f"zone={zone}", f"date={day}")
+
+def list_partitions(root=DEFAULT_STORE, zones=None):
+    """List stored (zone, day) partitions in zone and time order"""
+    partitions = []
+    if not os.path.isdir(root):
+        return partitions
+
+    for zone_dir in os.listdir(root):
+        if not zone_dir.startswith('zone='):
+            continue
+        zone = int(zone_dir[len('zone='):])
+        if zones is not None and zone not in zones:
+            continue
+        for day_dir in os.listdir(os.path.join(root, zone_dir)):
+            if day_dir.startswith('date='):
+                partitions.append((zone, day_dir[len('date='):]))
+
+    return sorted(partitions)
+
+def has_data(root=DEFAULT_STORE):
+    """Check whether the store holds any partitions"""
+    return len(list_partitions(root)) > 0
+
+def _read_partition(path, columns, start=None, end=None):
+    """Read projected columns of one partition, trimmed to [start, end)"""
+    timestamps = np.load(os.path.join(path, 'timestamp.npy'), mmap_mode='r')
+
+    # Rows are stored in time order, so the range is a pair of binary searches
+    lo = 0 if start is None else np.searchsorted(timestamps, np.datetime64(start, 'ns'), side='left')
+    hi = len(timestamps) if end is None else np.searchsorted(timestamps, np.datetime64(end, 'ns'), side='left')
+
+    block = {}
+    for column in columns:
+        values = np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r')
+        block[column] = np.array(values[lo:hi])
+    return block
+
+def write_timeseries(data, root=DEFAULT_STORE):
+    """Persist a frame as .npy column files partitioned by zone and day
+
+    Frames without a 'zone' column are stored as zone 0. Rows landing in an
+    existing partition are merged with it, newer values winning on equal
+    timestamps.
+    """
+    data = data.copy()
+    if 'zone' not in data:
+        data['zone'] = 0
+    data['timestamp'] = data['timestamp'].astype('datetime64[ns]')
+    data['_day'] = data['timestamp'].dt.strftime('%Y-%m-%d')
+
+    for (zone, day), part in data.groupby(['zone', '_day'], sort=False):
+        part = part.drop(columns=['zone', '_day'])
+        path = _partition_path(root, int(zone), day)
+
+        if os.path.isdir(path):
+            existing = pd.DataFrame(_read_partition(path, part.columns))
+            part = pd.concat([existing, part], ignore_index=True)
+            part = part.drop_duplicates('timestamp', keep='last')
+        part = part.sort_values('timestamp')
+
+        os.makedirs(path, exist_ok=True)
+        for column in part.columns:
+            np.save(os.path.join(path, f"{column}.npy"), part[column].to_numpy())
+        _update_rollups(root, int(zone), day, part)
+
+def _rollup_path(root, zone, level):
+    """Directory holding one zone's segments for one rollup level"""
+    return os.path.join(root, f"zone={zone}", f"rollup={level}")
+
+def _segment_key(level, timestamp):
+    """Segment a bucket starting at ``timestamp`` is stored in"""
+    return pd.Timestamp(timestamp).strftime('%Y-%m' if ROLLUP_SEGMENTS[level] == 'month' else '%Y')
+
+def _segment_path(root, zone, level, key):
+    return os.path.join(_rollup_path(root, zone, level), f"{ROLLUP_SEGMENTS[level]}={key}")
+
+def _segments(root, zone, level, start=None, end=None):
+    """Paths of a level's segments overlapping [start, end), in time order"""
+    path = _rollup_path(root, zone, level)
+    if not os.path.isdir(path):
+        return []
+    prefix = f"{ROLLUP_SEGMENTS[level]}="
+    keys = sorted(name[len(prefix):] for name in os.listdir(path) if name.startswith(prefix))
+    lo = None if start is None else _segment_key(level, start)
+    hi = None if end is None else _segment_key(level, end)
+    return [os.path.join(path, prefix + key) for key in keys
+            if (lo is None or key >= lo) and (hi is None or key <= hi)]
+
+def _bucket_starts(timestamps, level):
+    """Start of the ``level`` bucket each timestamp falls in (weeks start Monday)"""
+    timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+    if level == 'hour':
+        return timestamps.astype('datetime64[h]').astype('datetime64[ns]')
+    days = timestamps.astype('datetime64[D]')
+    if level == 'week':
+        days = days - (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    return days.astype('datetime64[ns]')
+
+def _aggregate(starts, counts, columns):
+    """Combine time-ordered rows into buckets with equal ``starts``
+
+    ``columns`` maps each column to a dict of 'sum', 'min' and 'max' arrays,
+    so raw rows (all three equal to the value) and finer buckets combine
+    the same way.
+    """
+    edges = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    buckets = {'start': starts[edges], 'count': np.add.reduceat(counts, edges)}
+    for column, stats in columns.items():
+        buckets[f"{column}.sum"] = np.add.reduceat(stats['sum'], edges)
+        buckets[f"{column}.min"] = np.minimum.reduceat(stats['min'], edges)
+        buckets[f"{column}.max"] = np.maximum.reduceat(stats['max'], edges)
+    return pd.DataFrame(buckets)
+
+def _load_level(path):
+    if not os.path.isdir(path):
+        return pd.DataFrame()
+    return pd.DataFrame({name[:-len('.npy')]: np.load(os.path.join(path, name))
+                         for name in os.listdir(path) if name.endswith('.npy')})
+
+def _splice_level(path, buckets, lo, hi):
+    """Replace a segment's buckets starting in [lo, hi) and save it"""
+    existing = _load_level(path)
+    if len(existing):
+        keep = (existing['start'] < lo) | (existing['start'] >= hi)
+        buckets = pd.concat([existing[keep], buckets], ignore_index=True).sort_values('start')
+    os.makedirs(path, exist_ok=True)
+    for column in buckets.columns:
+        np.save(os.path.join(path, f"{column}.npy"), buckets[column].to_numpy())
+    return buckets
+
+def _update_rollups(root, zone, day, part):
+    """Refresh the rollups touched by a rewritten day partition
+
+    The day's hour and day buckets are recomputed from the merged
+    partition, then its week bucket from the week's (at most seven) day
+    buckets. Each level is split into month or year segments and only the
+    segments holding those buckets are rewritten, so a write costs the
+    same however much history exists.
+    """
+    timestamps = part['timestamp'].to_numpy(dtype='datetime64[ns]')
+    values = {column: part[column].to_numpy(dtype=np.float64) for column in part.columns
+              if column != 'timestamp' and pd.api.types.is_numeric_dtype(part[column])}
+    raw = {column: {stat: v for stat in ROLLUP_STATS} for column, v in values.items()}
+    counts = np.ones(len(timestamps), dtype=np.int64)
+
+    lo = np.datetime64(day, 'ns')
+    hi = lo + np.timedelta64(1, 'D')
+    for level in ['hour', 'day']:
+        buckets = _aggregate(_bucket_starts(timestamps, level), counts, raw)
+        _splice_level(_segment_path(root, zone, level, _segment_key(level, lo)), buckets, lo, hi)
+
+    # A week may straddle two year segments of the day level
+    week = _bucket_starts(np.array([lo]), 'week')[0]
+    week_end = week + np.timedelta64(7, 'D')
+    days = pd.concat([_load_level(path) for path in _segments(root, zone, 'day', week, week_end)],
+                     ignore_index=True)
+    in_week = days[(days['start'] >= week) & (days['start'] < week_end)]
+    combined = {column: {stat: in_week[f"{column}.{stat}"].to_numpy() for stat in ROLLUP_STATS}
+                for column in values}
+    buckets = _aggregate(_bucket_starts(in_week['start'].to_numpy(), 'week'),
+                         in_week['count'].to_numpy(), combined)
+    _splice_level(_segment_path(root, zone, 'week', _segment_key('week', week)), buckets, week, week_end)
+
+def rebuild_rollups(root=DEFAULT_STORE, zones=None):
+    """Build the rollups of a store (or some of its zones) written before rollups existed"""
+    for zone, day in list_partitions(root, zones):
+        path = _partition_path(root, zone, day)
+        columns = [name[:-len('.npy')] for name in os.listdir(path) if name.endswith('.npy')]
+        _update_rollups(root, zone, day, pd.DataFrame(_read_partition(path, columns)))
+
+def _rollup_frame(buckets, columns, level):
+    """Chart-ready frame: bucket start plus mean, min, max and sum per column"""
+    count = np.asarray(buckets['count'], dtype=np.float64)
+    frame = pd.DataFrame({'timestamp': np.asarray(buckets['start'])})
+    for column in columns:
+        total = np.asarray(buckets[f"{column}.sum"])
+        frame[column] = total / count
+        frame[f"{column}_min"] = np.asarray(buckets[f"{column}.min"])
+        frame[f"{column}_max"] = np.asarray(buckets[f"{column}.max"])
+        frame[f"{column}_sum"] = total
+    frame.attrs['level'] = level
+    return frame
+
+def read_rollup(columns, start=None, end=None, span=None, zone=0, max_points=DEFAULT_POINT_BUDGET,
+                root=DEFAULT_STORE):
+    """Load a time range at the finest rollup level within ``max_points``
+
+    ``span`` (e.g. '24h', '365D') counts back from ``end``, which defaults
+    to the end of the newest hour stored. Levels are tried from hourly to
+    weekly and the first with at most ``max_points`` buckets in range is
+    used, so a year costs about as many points as a day. Only the chosen
+    level's segments overlapping the range are opened, and only their
+    bucket starts and the requested columns are read.
+
+    Returns a frame with 'timestamp' (bucket start) and, per column, the
+    mean under the column's name plus '<column>_min', '_max' and '_sum'.
+    The chosen level is in ``frame.attrs['level']``. A zone's rollups are
+    built on first use if it has partitions but no rollups yet.
+    """
+    names = ['start', 'count'] + [f"{c}.{s}" for c in columns for s in ROLLUP_STATS]
+    if not _segments(root, zone, 'hour') and list_partitions(root, [zone]):
+        rebuild_rollups(root, [zone])
+    hours = _segments(root, zone, 'hour')
+    if not hours:
+        return _rollup_frame({name: [] for name in names}, columns, None)
+    if end is None:
+        end = pd.Timestamp(np.load(os.path.join(hours[-1], 'start.npy'), mmap_mode='r')[-1]) + ROLLUP_LEVELS['hour']
+    end = pd.Timestamp(end)
+    start = end - pd.Timedelta(span) if span is not None else start
+
+    for level in ROLLUP_LEVELS:
+        ranges = []
+        for path in _segments(root, zone, level, start, end):
+            starts = np.load(os.path.join(path, 'start.npy'), mmap_mode='r')
+            lo = 0 if start is None else np.searchsorted(starts, np.datetime64(start, 'ns'), side='left')
+            hi = np.searchsorted(starts, np.datetime64(end, 'ns'), side='left')
+            if hi > lo:
+                ranges.append((path, lo, hi))
+        if sum(hi - lo for _, lo, hi in ranges) <= max_points:
+            break
+
+    buckets = {name: np.concatenate([np.array([], dtype='datetime64[ns]' if name == 'start' else np.float64)] +
+                                    [np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')[lo:hi]
+                                     for path, lo, hi in ranges])
+               for name in names}
+    return _rollup_frame(buckets, columns, level)
+
+def rollup_frame(data, columns, span=None, max_points=DEFAULT_POINT_BUDGET):
+    """In-memory equivalent of read_rollup for a frame of raw rows
+
+    Only 'timestamp' and ``columns`` are taken from ``data``, so anything
+    that selects a DataFrame by a column list (e.g. a CompactFrame) works.
+    """
+    data = data[['timestamp', *columns]].sort_values('timestamp')
+    if span is not None:
+        data = data[data['timestamp'] > data['timestamp'].iloc[-1] - pd.Timedelta(span)]
+    timestamps = data['timestamp'].to_numpy(dtype='datetime64[ns]')
+    raw = {column: {stat: data[column].to_numpy(dtype=np.float64) for stat in ROLLUP_STATS}
+           for column in columns}
+
+    for level in ROLLUP_LEVELS:
+        starts = _bucket_starts(timestamps, level)
+        if len(starts) == 0 or np.count_nonzero(starts[1:] != starts[:-1]) + 1 <= max_points:
+            break
+    buckets = _aggregate(starts, np.ones(len(starts), dtype=np.int64), raw) if len(starts) else \
+        {'start': [], 'count': [], **{f"{c}.{s}": [] for c in columns for s in ROLLUP_STATS}}
+    return _rollup_frame(buckets, columns, level)
+
+def read_timeseries(root=DEFAULT_STORE, columns=None, start=None, end=None, zones=None):
+    """Load a time range from the store
+
+    Only the requested columns are opened (memory-mapped) and only the day
+    partitions overlapping [start, end) are touched. Without ``columns`` all
+    stored columns are returned together with 'zone'.
+    """
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+
+    blocks = []
+    for zone, day in list_partitions(root, zones):
+        day = pd.Timestamp(day)
+        if start is not None and day + pd.Timedelta(days=1) <= start:
+            continue
+        if end is not None and day >= end:
+            continue
+
+        path = _partition_path(root, zone, day.strftime('%Y-%m-%d'))
+        if columns is None:
+            wanted = sorted(name[:-len('.npy')] for name in os.listdir(path) if name.endswith('.npy'))
+            wanted.remove('timestamp')
+            wanted = ['zone', 'timestamp'] + wanted
+        else:
+            wanted = list(columns)
+
+        stored = [column for column in wanted if column != 'zone']
+        block = _read_partition(path, stored, start, end)
+        if 'zone' in wanted:
+            block['zone'] = np.full(len(next(iter(block.values()))), zone, dtype=np.int32)
+        blocks.append(pd.DataFrame({column: block[column] for column in wanted}))
+
+    if not blocks:
+        return pd.DataFrame(columns=list(columns) if columns is not None else ['zone', 'timestamp'])
+    return pd.concat(blocks, ignore_index=True)
+
+def read_recent(periods, columns=None, root=DEFAULT_STORE, zone=0):
+    """Load the last ``periods`` rows of one zone
+
+    Walks day partitions backwards and stops as soon as enough rows are
+    collected, so only the newest few days are ever read.
+    """
+    columns = ['timestamp'] + [c for c in (columns or []) if c != 'timestamp']
+    days = [day for _, day in list_partitions(root, [zone])]
+
+    blocks = []
+    rows = 0
+    for day in reversed(days):
+        block = _read_partition(_partition_path(root, zone, day), columns)
+        blocks.append(pd.DataFrame(block))
+        rows += len(blocks[-1])
+        if rows >= periods:
+            break
+
+    if not blocks:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(blocks[::-1], ignore_index=True).tail(periods).reset_index(drop=True)
+
+# Test the functions
+if __name__ == "__main__":
+    print("🗄️ Testing columnar store...")
+    test_data = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-15', periods=72, freq='h'),
+        'temperature': np.random.normal(38, 3, 72)
+    })
+    write_timeseries(test_data, 'test_store')
+    subset = read_timeseries('test_store', columns=['timestamp', 'temperature'],
+                             start='2024-01-16', end='2024-01-16 12:00')
+    print(f"✅ Read {len(subset)} rows from {len(list_partitions('test_store'))} partitions")
+    year = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=24 * 366, freq='h'),
+        'temperature': np.random.normal(38, 3, 24 * 366)
+    })
+    for month in range(12):
+        write_timeseries(year[year['timestamp'].dt.month == month + 1], 'test_store')
+    for span in ['24h', '30D', '366D']:
+        view = read_rollup(['temperature'], span=span, root='test_store')
+        print(f"✅ {span}: {len(view)} points at the {view.attrs['level']} level")
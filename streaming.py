@@ -0,0 +1,224 @@
+import csv
+import os
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Readings kept per zone and column (one day of hourly readings)
+DEFAULT_WINDOW = 24
+
+# Measurements a reading may carry besides 'zone' and 'timestamp'
+STREAM_COLUMNS = ['temperature', 'total_water_demand', 'residential_water', 'agricultural_water',
+                  'industrial_water', 'energy_consumption', 'solar_power']
+
+# Where the file-tail stand-in looks for appended meter readings
+DEFAULT_STREAM_FILE = os.path.join('data', 'stream', 'readings.csv')
+
+class RollingWindow:
+    """Ring buffer of the last ``size`` readings with O(1) rolling aggregates
+
+    The running sum is adjusted by the value entering and the one leaving;
+    the peak comes from a monotonic deque of (sequence, value) pairs whose
+    front is always the window maximum. The sum is recomputed from the
+    buffer each time the ring wraps so rounding errors can't accumulate.
+    """
+
+    def __init__(self, size=DEFAULT_WINDOW):
+        self.size = size
+        self.values = np.zeros(size, dtype=np.float64)
+        self.times = np.zeros(size, dtype='datetime64[ns]')
+        self.count = 0
+        self.head = 0       # slot the next reading goes into
+        self.total = 0.0
+        self.pushed = 0     # readings seen so far
+        self._peaks = deque()
+
+    def push(self, timestamp, value):
+        """Add one reading, evicting the oldest once the window is full"""
+        if self.count == self.size:
+            self.total -= self.values[self.head]
+        else:
+            self.count += 1
+        self.values[self.head] = value
+        self.times[self.head] = timestamp
+        self.total += value
+        self.head = (self.head + 1) % self.size
+        if self.head == 0:
+            self.total = float(self.values[:self.count].sum())
+
+        while self._peaks and self._peaks[-1][1] <= value:
+            self._peaks.pop()
+        self._peaks.append((self.pushed, value))
+        if self._peaks[0][0] <= self.pushed - self.size:
+            self._peaks.popleft()
+        self.pushed += 1
+
+    @property
+    def sum(self):
+        return self.total
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    @property
+    def peak(self):
+        return self._peaks[0][1] if self._peaks else np.nan
+
+    @property
+    def latest(self):
+        return self.values[self.head - 1] if self.count else np.nan
+
+    @property
+    def latest_time(self):
+        return self.times[self.head - 1] if self.count else None
+
+    def ordered(self):
+        """Timestamps and values in the window, oldest first"""
+        start = (self.head - self.count) % self.size
+        index = (start + np.arange(self.count)) % self.size
+        return self.times[index], self.values[index]
+
+class FrameSource:
+    """Replays the rows of a DataFrame as readings, ``batch_size`` per poll"""
+
+    def __init__(self, frame, batch_size=24):
+        self.frame = frame if 'zone' in frame else frame.assign(zone=0)
+        self.batch_size = batch_size
+        self.position = 0
+
+    def poll(self):
+        batch = self.frame.iloc[self.position:self.position + self.batch_size]
+        self.position += len(batch)
+        return batch
+
+class FileTailSource:
+    """Follows a CSV file of readings as lines are appended to it
+
+    The file needs a header with 'zone', 'timestamp' and any of
+    STREAM_COLUMNS. Each poll returns only complete new lines; a file that
+    shrinks (rotated or truncated) is read again from the start.
+    """
+
+    def __init__(self, path=DEFAULT_STREAM_FILE):
+        self.path = path
+        self.offset = 0
+        self.header = None
+
+    def poll(self):
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+        if os.path.getsize(self.path) < self.offset:
+            self.offset, self.header = 0, None
+
+        with open(self.path, newline='') as stream:
+            stream.seek(self.offset)
+            chunk = stream.read()
+        complete = chunk[:chunk.rfind('\n') + 1]
+        self.offset += len(complete.encode())
+
+        rows = list(csv.reader(complete.splitlines()))
+        if self.header is None and rows:
+            self.header, rows = rows[0], rows[1:]
+        if not rows:
+            return pd.DataFrame()
+        frame = pd.DataFrame(rows, columns=self.header)
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+        frame['zone'] = frame['zone'].astype(int)
+        for column in frame.columns.intersection(STREAM_COLUMNS):
+            frame[column] = pd.to_numeric(frame[column])
+        return frame
+
+class SensorStream:
+    """Per-zone rolling windows fed from one or more pluggable sources
+
+    A source is any object with a ``poll()`` method returning a DataFrame
+    of new readings ('zone', 'timestamp' and measurement columns). Readings
+    older than a zone's latest one are dropped, so replays are harmless.
+    Reads and writes all hold one lock, so a stream can be shared between
+    threads (e.g. every Streamlit session).
+    """
+
+    def __init__(self, sources=(), window=DEFAULT_WINDOW):
+        self.sources = list(sources)
+        self.window = window
+        self.zones = {}
+        self.latest = {}   # newest timestamp accepted per zone
+        self.readings = 0  # accepted readings, changes whenever aggregates do
+        self._lock = threading.RLock()
+
+    def _windows(self, zone):
+        with self._lock:
+            if zone not in self.zones:
+                self.zones[zone] = {column: RollingWindow(self.window) for column in STREAM_COLUMNS}
+            return self.zones[zone]
+
+    def ingest(self, frame):
+        """Push every reading of a frame into its zone's windows"""
+        columns = [column for column in STREAM_COLUMNS if column in frame]
+        if frame.empty or not columns:
+            return 0
+        zones = frame['zone'].to_numpy() if 'zone' in frame else np.zeros(len(frame), dtype=int)
+        times = frame['timestamp'].to_numpy(dtype='datetime64[ns]')
+        values = frame[columns].to_numpy(dtype=np.float64)
+
+        accepted = 0
+        with self._lock:
+            for zone, timestamp, row in zip(zones.tolist(), times, values):
+                latest = self.latest.get(zone)
+                if latest is not None and timestamp <= latest:
+                    continue
+                self.latest[zone] = timestamp
+                windows = self._windows(zone)
+                for column, value in zip(columns, row):
+                    if not np.isnan(value):
+                        windows[column].push(timestamp, value)
+                accepted += 1
+            self.readings += accepted
+        return accepted
+
+    def poll(self):
+        """Ingest whatever every source has produced since the last poll"""
+        with self._lock:
+            return sum(self.ingest(source.poll()) for source in self.sources)
+
+    def aggregates(self, column, zone=0):
+        """Rolling sum, mean, peak and latest value of a column"""
+        with self._lock:
+            window = self._windows(zone)[column]
+            return {'sum': window.sum, 'mean': window.mean, 'peak': window.peak, 'latest': window.latest,
+                    'count': window.count}
+
+    def recent(self, column, zone=0, periods=None):
+        """Readings of a column still in the window, oldest first"""
+        with self._lock:
+            times, values = self._windows(zone)[column].ordered()
+        if periods is not None:
+            times, values = times[-periods:], values[-periods:]
+        return pd.DataFrame({'timestamp': times, column: values})
+
+# Test the functions
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from model import generate_synthetic_data
+
+    print("📡 Testing sensor stream...")
+    data = generate_synthetic_data()
+    path = os.path.join(tempfile.mkdtemp(), 'readings.csv')
+    data.iloc[:100].assign(zone=0).to_csv(path, index=False)
+    stream = SensorStream([FileTailSource(path)])
+    stream.poll()
+    data.iloc[100:].assign(zone=0).to_csv(path, mode='a', header=False, index=False)
+    stream.poll()
+    stats = stream.aggregates('temperature')
+    tail = data['temperature'].tail(DEFAULT_WINDOW)
+    print(f"✅ {stream.readings} readings, rolling mean {stats['mean']:.3f} (frame {tail.mean():.3f}), "
+          f"peak {stats['peak']:.3f} (frame {tail.max():.3f})")
+
+    big = SensorStream(window=168)
+    frame = pd.concat([data.assign(zone=z) for z in range(100)]).sort_values('timestamp')
+    started = time.perf_counter()
+    big.ingest(frame)
+    print(f"✅ {len(frame)} readings into 100 zones in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,317 @@
+import hashlib
+from functools import lru_cache
+import numpy as np
+
+# Scenario names used across the app
+BUSINESS_AS_USUAL = "Business as Usual"
+UWHIS_ACTIVATED = "UWHIS Activated"
+
+# City center and extent of the demo area ([[south, west], [north, east]])
+DUBAI_CENTER = [25.2048, 55.2708]
+DUBAI_BOUNDS = [[25.10, 55.20], [25.30, 55.40]]
+
+# Zone status codes and the colors they are drawn with
+STATUSES = np.array(['attention', 'monitoring', 'optimized'])
+ATTENTION, MONITORING, OPTIMIZED = 0, 1, 2
+STATUS_COLORS = np.array(['red', 'orange', 'green'])
+
+# Zone types; optimized agricultural zones are drawn blue
+ZONE_TYPES = np.array(['downtown', 'agricultural', 'residential', 'industrial'])
+
+# Demonstration zones, one row per zone
+DEMO_ZONES = [
+    {
+        'id': 'downtown',
+        'name': 'Downtown District',
+        'zone_type': 'downtown',
+        'coords': [25.1972, 55.2744],
+        'temperature': 42.5,
+        'optimized_temperature': 36.5,
+        'water_demand': 450000,
+        'cooling_need': 'High',
+        'status': {BUSINESS_AS_USUAL: ATTENTION, UWHIS_ACTIVATED: OPTIMIZED},
+        'interventions': ['Smart misting', 'Shaded pavements', 'Building cooling']
+    },
+    {
+        'id': 'agricultural',
+        'name': 'Agricultural Zone A',
+        'zone_type': 'agricultural',
+        'coords': [25.1150, 55.3800],
+        'temperature': 38.0,
+        'optimized_temperature': 38.0,
+        'water_demand': 800000,
+        'cooling_need': 'Medium',
+        'status': {BUSINESS_AS_USUAL: MONITORING, UWHIS_ACTIVATED: OPTIMIZED},
+        'interventions': ['Drip irrigation', 'Soil moisture sensors', 'Evening watering']
+    },
+    {
+        'id': 'residential',
+        'name': 'Residential Complex',
+        'zone_type': 'residential',
+        'coords': [25.2350, 55.2900],
+        'temperature': 40.0,
+        'optimized_temperature': 34.0,
+        'water_demand': 350000,
+        'cooling_need': 'High',
+        'status': {BUSINESS_AS_USUAL: ATTENTION, UWHIS_ACTIVATED: OPTIMIZED},
+        'interventions': ['Smart meters', 'Leak detection', 'Peak shifting']
+    },
+    {
+        'id': 'industrial',
+        'name': 'Industrial Park',
+        'zone_type': 'industrial',
+        'coords': [25.1500, 55.2500],
+        'temperature': 41.0,
+        'optimized_temperature': 41.0,
+        'water_demand': 300000,
+        'cooling_need': 'Medium',
+        'status': {BUSINESS_AS_USUAL: MONITORING, UWHIS_ACTIVATED: MONITORING},
+        'interventions': ['Water recycling', 'Process cooling', 'Solar pumping']
+    }
+]
+
+class SpatialGrid:
+    """Uniform grid hash over zone coordinates
+
+    Points are bucketed into square cells (equirectangular projection, so
+    cells are square on the ground) and stored sorted by cell, giving each
+    cell a contiguous slice. Viewport and nearest-neighbour queries only
+    look at the cells that can contain an answer.
+    """
+
+    def __init__(self, lat, lon, points_per_cell=8):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        # Scale longitude so a degree east equals a degree north on the ground
+        self._lon_scale = np.cos(np.radians(self.lat.mean())) if len(self.lat) else 1.0
+        x, y = self.lon * self._lon_scale, self.lat
+
+        self._x0, self._y0 = (x.min(), y.min()) if len(x) else (0.0, 0.0)
+        extent = max(np.ptp(x) if len(x) else 0, np.ptp(y) if len(y) else 0, 1e-9)
+        cells_per_side = max(1, int(np.sqrt(len(x) / points_per_cell)))
+        self._cell = extent / cells_per_side * (1 + 1e-9)
+        self._nx = int(np.ptp(x) // self._cell) + 1 if len(x) else 1
+        self._ny = int(np.ptp(y) // self._cell) + 1 if len(y) else 1
+
+        ix, iy = self._cells(x, y)
+        cell_ids = iy * self._nx + ix
+        self._order = np.argsort(cell_ids, kind='stable')
+        self._offsets = np.searchsorted(cell_ids[self._order], np.arange(self._nx * self._ny + 1))
+
+    def _cells(self, x, y):
+        ix = np.clip(((x - self._x0) // self._cell).astype(np.int64), 0, self._nx - 1)
+        iy = np.clip(((y - self._y0) // self._cell).astype(np.int64), 0, self._ny - 1)
+        return ix, iy
+
+    def _rows_in_cells(self, ix0, ix1, iy0, iy1):
+        """Candidate rows in an inclusive block of cells"""
+        ix0, ix1 = max(ix0, 0), min(ix1, self._nx - 1)
+        iy0, iy1 = max(iy0, 0), min(iy1, self._ny - 1)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype=np.int64)
+        # Cells in one grid row are adjacent in sorted order: one slice per row
+        slices = [self._order[self._offsets[iy * self._nx + ix0]:self._offsets[iy * self._nx + ix1 + 1]]
+                  for iy in range(iy0, iy1 + 1)]
+        return np.concatenate(slices)
+
+    def in_bbox(self, south, west, north, east):
+        """Rows of zones inside a lat/lon bounding box, in row order"""
+        ix0, iy0 = self._cells(np.array([west * self._lon_scale]), np.array([south]))
+        ix1, iy1 = self._cells(np.array([east * self._lon_scale]), np.array([north]))
+        rows = self._rows_in_cells(ix0[0], ix1[0], iy0[0], iy1[0])
+        inside = ((self.lat[rows] >= south) & (self.lat[rows] <= north) &
+                  (self.lon[rows] >= west) & (self.lon[rows] <= east))
+        return np.sort(rows[inside])
+
+    def _distances(self, rows, lat, lon):
+        dx = (self.lon[rows] - lon) * self._lon_scale
+        dy = self.lat[rows] - lat
+        return np.hypot(dx, dy)
+
+    def nearest(self, lat, lon, n=1):
+        """Rows of the ``n`` zones closest to a point, nearest first"""
+        n = min(n, len(self.lat))
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        x, y = lon * self._lon_scale, lat
+        ix, iy = self._cells(np.array([x]), np.array([y]))
+        ix, iy = ix[0], iy[0]
+
+        # Grow a square of cells until it holds n candidates ...
+        radius = 0
+        rows = self._rows_in_cells(ix, ix, iy, iy)
+        while len(rows) < n:
+            radius += 1
+            rows = self._rows_in_cells(ix - radius, ix + radius, iy - radius, iy + radius)
+
+        # ... then widen it to cover the n-th candidate's distance, which
+        # guarantees no closer zone sits in an unvisited cell
+        reach = np.partition(self._distances(rows, lat, lon), n - 1)[n - 1]
+        radius = int(np.ceil(reach / self._cell)) + 1
+        rows = self._rows_in_cells(ix - radius, ix + radius, iy - radius, iy + radius)
+
+        distances = self._distances(rows, lat, lon)
+        closest = np.argpartition(distances, n - 1)[:n]
+        return rows[closest[np.argsort(distances[closest], kind='stable')]]
+
+class ZoneRegistry:
+    """Zone definitions held as parallel arrays (struct of arrays)
+
+    Every attribute is an array with one entry per zone, so per-scenario
+    values for all zones are single vectorized expressions. ``row`` maps a
+    zone id to its array position in O(1).
+    """
+
+    def __init__(self, ids, names, zone_types, lat, lon, temperature, optimized_temperature,
+                 water_demand, cooling_need, status, interventions):
+        self.ids = np.asarray(ids, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.zone_types = np.asarray(zone_types, dtype=np.int8)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.temperature = np.asarray(temperature, dtype=np.float32)
+        self.optimized_temperature = np.asarray(optimized_temperature, dtype=np.float32)
+        self.water_demand = np.asarray(water_demand, dtype=np.int64)
+        self.cooling_need = np.asarray(cooling_need, dtype=object)
+        # Status code per scenario, shape (zones,) each
+        self.status = {scenario: np.asarray(codes, dtype=np.int8) for scenario, codes in status.items()}
+        self.interventions = list(interventions)
+        self._index = {zone_id: row for row, zone_id in enumerate(self.ids)}
+        self._spatial_index = None
+        self._version = None
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a registry from a list of zone dicts (DEMO_ZONES layout)"""
+        type_codes = {name: code for code, name in enumerate(ZONE_TYPES)}
+        scenarios = records[0]['status'].keys() if records else []
+        return cls(
+            ids=[r['id'] for r in records],
+            names=[r['name'] for r in records],
+            zone_types=[type_codes[r['zone_type']] for r in records],
+            lat=[r['coords'][0] for r in records],
+            lon=[r['coords'][1] for r in records],
+            temperature=[r['temperature'] for r in records],
+            optimized_temperature=[r['optimized_temperature'] for r in records],
+            water_demand=[r['water_demand'] for r in records],
+            cooling_need=[r['cooling_need'] for r in records],
+            status={s: [r['status'][s] for r in records] for s in scenarios},
+            interventions=[r['interventions'] for r in records]
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, zone_id):
+        return zone_id in self._index
+
+    def row(self, zone_id):
+        """Array position of a zone id"""
+        return self._index[zone_id]
+
+    def name(self, zone_id):
+        return self.names[self._index[zone_id]]
+
+    @property
+    def version(self):
+        """Short fingerprint of the zone data; changes whenever any zone does"""
+        if self._version is None:
+            digest = hashlib.sha1()
+            for values in (self.lat, self.lon, self.temperature, self.optimized_temperature,
+                           self.water_demand, self.zone_types):
+                digest.update(np.ascontiguousarray(values).tobytes())
+            for scenario in sorted(self.status):
+                digest.update(scenario.encode())
+                digest.update(self.status[scenario].tobytes())
+            digest.update(repr((list(self.ids), list(self.names), list(self.cooling_need),
+                                self.interventions)).encode())
+            self._version = digest.hexdigest()[:12]
+        return self._version
+
+    @property
+    def spatial_index(self):
+        """Grid index over zone coordinates, built on first use"""
+        if self._spatial_index is None:
+            self._spatial_index = SpatialGrid(self.lat, self.lon)
+        return self._spatial_index
+
+    def in_bbox(self, south, west, north, east):
+        """Rows of zones inside a bounding box"""
+        return self.spatial_index.in_bbox(south, west, north, east)
+
+    def nearest(self, lat, lon, n=1):
+        """Ids of the ``n`` zones nearest to a point, nearest first"""
+        return self.ids[self.spatial_index.nearest(lat, lon, n)]
+
+    def temperatures(self, scenario):
+        """Zone temperatures under a scenario"""
+        if scenario == UWHIS_ACTIVATED:
+            return self.optimized_temperature
+        return self.temperature
+
+    def statuses(self, scenario):
+        """Status codes (ATTENTION, MONITORING, OPTIMIZED) under a scenario"""
+        return self.status[scenario]
+
+    def colors(self, scenario):
+        """Marker colors under a scenario"""
+        status = self.statuses(scenario)
+        colors = STATUS_COLORS[status]
+        agricultural = self.zone_types == np.flatnonzero(ZONE_TYPES == 'agricultural')[0]
+        return np.where(agricultural & (status == OPTIMIZED), 'blue', colors)
+
+    def zone(self, zone_id, scenario=None):
+        """Dict view of one zone, with scenario values when a scenario is given"""
+        row = self._index[zone_id]
+        record = {
+            'id': zone_id,
+            'name': self.names[row],
+            'zone_type': str(ZONE_TYPES[self.zone_types[row]]),
+            'coords': [float(self.lat[row]), float(self.lon[row])],
+            'temperature': float(self.temperature[row]),
+            'water_demand': int(self.water_demand[row]),
+            'cooling_need': self.cooling_need[row],
+            'interventions': self.interventions[row]
+        }
+        if scenario is not None:
+            record['temp'] = float(self.temperatures(scenario)[row])
+            record['status'] = str(STATUSES[self.statuses(scenario)[row]])
+            record['color'] = str(self.colors(scenario)[row])
+        return record
+
+@lru_cache(maxsize=1)
+def get_zone_registry():
+    """Shared registry of the demonstration zones, built once per process"""
+    return ZoneRegistry.from_records(DEMO_ZONES)
+
+def generate_synthetic_zones(n_zones, seed=42):
+    """Registry of ``n_zones`` random zones around Dubai, for scale testing"""
+    rng = np.random.default_rng(np.random.SeedSequence(seed))
+    zone_types = rng.integers(0, len(ZONE_TYPES), n_zones)
+    temperature = rng.uniform(34, 44, n_zones)
+    return ZoneRegistry(
+        ids=[f"zone_{i:05d}" for i in range(n_zones)],
+        names=[f"Zone {i}" for i in range(n_zones)],
+        zone_types=zone_types,
+        lat=rng.uniform(24.95, 25.35, n_zones),
+        lon=rng.uniform(55.05, 55.55, n_zones),
+        temperature=temperature,
+        optimized_temperature=temperature - rng.uniform(0, 6, n_zones),
+        water_demand=rng.integers(100000, 900000, n_zones),
+        cooling_need=np.where(temperature > 40, 'High', 'Medium'),
+        status={
+            BUSINESS_AS_USUAL: np.where(temperature > 40, ATTENTION, MONITORING),
+            UWHIS_ACTIVATED: rng.choice([MONITORING, OPTIMIZED], n_zones, p=[0.2, 0.8])
+        },
+        interventions=[DEMO_ZONES[t]['interventions'] for t in zone_types]
+    )
+
+# Test the functions
+if __name__ == "__main__":
+    print("🏙️ Testing zone registry...")
+    registry = get_zone_registry()
+    print("Demo zones:", list(registry.ids))
+    large = generate_synthetic_zones(50000)
+    print(f"✅ {len(large)} synthetic zones, lookup row {large.row('zone_49999')}")
+    print(f"✅ {len(large.in_bbox(25.15, 55.20, 25.25, 55.30))} zones in viewport, "
+          f"nearest to Downtown: {list(large.nearest(25.1972, 55.2744, 3))}")